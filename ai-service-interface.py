@@ -4,7 +4,7 @@ Define o contrato que qualquer serviço de IA deve implementar.
 """
 from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, List, Optional, Protocol, Any
+from typing import Dict, Iterable, List, Optional, Protocol, Any
 
 
 class AIModel(str, Enum):
@@ -44,6 +44,7 @@ class IAIService(Protocol):
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 512,
+        tenant_id: Optional[str] = None,
     ) -> str:
         """
         Gera uma resposta de texto a partir de um prompt.
@@ -54,6 +55,7 @@ class IAIService(Protocol):
             model: Modelo a ser usado (opcional).
             temperature: Temperatura para geração (mais alta = mais criativa).
             max_tokens: Máximo de tokens a gerar.
+            tenant_id: ID do tenant (opcional, usa o contexto atual).
             
         Returns:
             Texto gerado.
@@ -64,6 +66,7 @@ class IAIService(Protocol):
         self,
         text: str,
         model: Optional[str] = None,
+        tenant_id: Optional[str] = None,
     ) -> List[float]:
         """
         Gera embeddings (representações vetoriais) para um texto.
@@ -71,12 +74,48 @@ class IAIService(Protocol):
         Args:
             text: Texto para gerar embeddings.
             model: Modelo a ser usado (opcional).
+            tenant_id: ID do tenant (opcional, usa o contexto atual).
             
         Returns:
             Lista de valores do vetor de embedding.
         """
         ...
     
+    async def generate_embeddings_batch(
+        self,
+        texts: List[str],
+        model: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+    ) -> List[List[float]]:
+        """
+        Gera embeddings para vários textos em uma única requisição.
+        
+        Args:
+            texts: Textos para gerar embeddings.
+            model: Modelo a ser usado (opcional).
+            tenant_id: ID do tenant (opcional, usa o contexto atual).
+            
+        Returns:
+            Lista de vetores de embedding, na mesma ordem dos textos.
+        """
+        ...
+    
+    async def warm(
+        self,
+        texts: Iterable[str],
+        model: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+    ) -> None:
+        """
+        Pré-carrega no cache os embeddings de textos usados com frequência.
+        
+        Args:
+            texts: Textos conhecidos (nomes de templates, categorias etc).
+            model: Modelo a ser usado (opcional).
+            tenant_id: ID do tenant (opcional, usa o contexto atual).
+        """
+        ...
+    
     async def health_check(self) -> bool:
         """
         Verifica se o serviço de IA está operacional.
@@ -85,6 +85,11 @@ def check_role(allowed_roles: list[UserRole]):
     Returns:
         Função de dependência.
     """
+    # Papéis que dão acesso, como máscara de bits (administradores sempre têm acesso)
+    allowed_mask = UserRole.ADMIN
+    for role in allowed_roles:
+        allowed_mask |= role
+    
     async def _check_role(current_user: User = Depends(get_current_user)) -> User:
         """
         Verifica se o usuário tem um dos papéis permitidos.
@@ -98,14 +103,9 @@ def check_role(allowed_roles: list[UserRole]):
         Raises:
             HTTPException: Se o usuário não tiver permissão.
         """
-        # Administradores têm acesso a tudo
-        if UserRole.ADMIN in current_user.roles:
+        # Verificar papel do usuário (uma única operação de bits)
+        if current_user.roles & allowed_mask:
             return current_user
-            
-        # Verificar papel do usuário
-        for role in current_user.roles:
-            if role in allowed_roles:
-                return current_user
                 
         logger.warning(f"Acesso negado para usuário {current_user.id}. Necessário: {allowed_roles}")
         raise HTTPException(
@@ -127,7 +127,8 @@ async def get_tenant_context(request: Request) -> TenantContext:
     Returns:
         Contexto de tenant.
     """
-    return request.app.state.injector.get(TenantContext)
+    # Resolvido uma vez na inicialização (lifespan), sem consultar o injector
+    return request.app.state.tenant_context
 
 
 # Dependência para obter o tenant_id atual
@@ -48,6 +48,7 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: RedisDsn
+    REDIS_POOL_SIZE: int = 50
     
     @validator("REDIS_URL", pre=True)
     def validate_redis_url(cls, v: Optional[str]) -> Any:
@@ -63,14 +64,17 @@ class Settings(BaseSettings):
     
     # LocalAI
     LOCAL_AI_URL: AnyHttpUrl = "http://local-ai:8080"
+    AI_WARMUP_TEXTS: List[str] = []  # Textos com embeddings pré-carregados na inicialização
     
     # Tenant
     DEFAULT_TENANT_ID: str = "tenant_pilates_mvp"
     MULTI_TENANT_ENABLED: bool = False  # Desabilitado para MVP
+    KNOWN_TENANTS: List[str] = []  # Tenants aceitos no modo multi-tenant (vazio = qualquer um)
     
     # Plugins
     PLUGINS_ENABLED: bool = True
     PLUGINS_AUTO_DISCOVER: bool = True
+    PLUGINS_LAZY_LOAD: bool = False  # Carrega plugins de nicho só no primeiro uso
     
     # Integração WhatsApp
     TWILIO_ACCOUNT_SID: Optional[str] = None
@@ -34,7 +34,7 @@ from app.core.services.appointment_service import AppointmentService
 from app.core.services.faq_service import FAQService
 from app.adapters.cache.redis_cache import RedisCache
 from app.core.interfaces.cache import ICache
-from app.plugins.manager import PluginManager
+from app.plugins.manager import DEFAULT_MANIFEST_PATH, PluginManager
 
 
 logger = logging.getLogger(__name__)
@@ -63,7 +63,10 @@ class ApplicationModule(Module):
     @provider
     def provide_cache(self) -> ICache:
         """Fornece o serviço de cache."""
-        return RedisCache(redis_url=str(settings.REDIS_URL))
+        return RedisCache(
+            redis_url=str(settings.REDIS_URL),
+            max_connections=settings.REDIS_POOL_SIZE,
+        )
     
     @singleton
     @provider
@@ -146,18 +149,26 @@ class ApplicationModule(Module):
     
     @singleton
     @provider
-    def provide_ai_service(self, cache: ICache) -> IAIService:
+    def provide_ai_service(self, cache: ICache, tenant_context: TenantContext) -> IAIService:
         """Fornece o serviço de IA."""
         return LocalAIService(
             api_url=str(settings.LOCAL_AI_URL),
             cache=cache,
+            tenant_context=tenant_context,
         )
     
     @singleton
     @provider
     def provide_plugin_manager(self) -> PluginManager:
         """Fornece o gerenciador de plugins."""
-        return PluginManager()
+        manager = PluginManager()
+        
+        if settings.PLUGINS_ENABLED and settings.PLUGINS_AUTO_DISCOVER:
+            # Manifesto evita varrer os pacotes; sem ele, descobre e gera o manifesto
+            if not manager.discover_plugins_fast(lazy=settings.PLUGINS_LAZY_LOAD):
+                manager.discover_plugins(manifest_path=DEFAULT_MANIFEST_PATH)
+        
+        return manager
     
     @singleton
     @provider
@@ -8,8 +8,12 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.adapters.messaging.message_provider_factory import MessageProviderFactory
 from app.api.router import api_router
 from app.core.config import settings
+from app.core.interfaces.ai_service import IAIService
+from app.core.interfaces.cache import ICache
+from app.core.services.tenant_context import TenantContext
 from app.di_container import setup_di
 from app.utils.logging import setup_logging
 
@@ -29,6 +33,16 @@ async def lifespan(app: FastAPI):
     # Registrar recursos compartilhados na aplicação
     logger.info("🔌 Configurando container de dependências")
     app.state.injector = setup_di()
+    # Singleton resolvido uma vez (lido por requisição em get_tenant_context)
+    app.state.tenant_context = app.state.injector.get(TenantContext)
+    
+    # Pré-carregar embeddings de textos conhecidos (falha não impede a inicialização)
+    if settings.AI_WARMUP_TEXTS:
+        logger.info("🔥 Aquecendo cache de embeddings")
+        try:
+            await app.state.injector.get(IAIService).warm(settings.AI_WARMUP_TEXTS)
+        except Exception as e:
+            logger.warning(f"Falha ao aquecer cache de embeddings: {str(e)}")
     
     logger.info("✅ Aplicação iniciada com sucesso")
     yield
@@ -36,6 +50,9 @@ async def lifespan(app: FastAPI):
     # Limpeza de recursos ao encerrar
     logger.info("🛑 Finalizando aplicação")
     # Fechar conexões de banco e outros recursos
+    await app.state.injector.get(IAIService).close()
+    await app.state.injector.get(ICache).close()
+    await app.state.injector.get(MessageProviderFactory).close()
     logger.info("👋 Aplicação finalizada")
 
 
@@ -74,6 +74,20 @@ class ICache(Protocol):
         """
         ...
     
+    async def increment_with_ttl(self, key: str, amount: int, ttl: int) -> int:
+        """
+        Incrementa um valor numérico e define sua expiração em uma única operação atômica.
+        
+        Args:
+            key: Chave para incrementar.
+            amount: Valor a incrementar.
+            ttl: Tempo de vida em segundos (aplicado se a chave ainda não expira).
+            
+        Returns:
+            Novo valor após incremento.
+        """
+        ...
+    
     async def expire(self, key: str, seconds: int) -> bool:
         """
         Define o tempo de expiração para uma chave.
@@ -155,3 +169,7 @@ class ICache(Protocol):
             True se operacional, False caso contrário.
         """
         ...
+    
+    async def close(self) -> None:
+        """Libera as conexões com o serviço de cache."""
+        ...
@@ -0,0 +1,51 @@
+"""
+Geração de IDs (UUID versão 4) compartilhada pelas entidades do domínio central.
+"""
+import os
+import threading
+from typing import Iterator
+from uuid import UUID
+
+
+def _uuid_pool(batch: int = 1024) -> Iterator[UUID]:
+    """
+    Gera UUIDs versão 4 lendo os bytes aleatórios em lotes.
+    
+    Uma chamada a os.urandom a cada `batch` UUIDs, em vez de uma por UUID.
+    
+    Args:
+        batch: Quantidade de UUIDs por leitura.
+        
+    Yields:
+        UUIDs aleatórios (versão 4, variante RFC 4122).
+    """
+    while True:
+        buf = os.urandom(16 * batch)
+        for i in range(0, len(buf), 16):
+            # version=4 ajusta os bits de versão e de variante
+            yield UUID(bytes=buf[i:i + 16], version=4)
+
+
+_uuid_lock = threading.Lock()
+_uuids = _uuid_pool()
+
+
+def _reset_uuid_pool() -> None:
+    """Descarta o lote herdado do processo pai (evita UUIDs repetidos entre workers)."""
+    global _uuid_lock, _uuids
+    _uuid_lock = threading.Lock()
+    _uuids = _uuid_pool()
+
+
+os.register_at_fork(after_in_child=_reset_uuid_pool)
+
+
+def next_uuid() -> UUID:
+    """
+    Retorna o próximo UUID do pool (seguro entre threads e após fork).
+    
+    Returns:
+        UUID aleatório (versão 4, variante RFC 4122).
+    """
+    with _uuid_lock:
+        return next(_uuids)
@@ -82,7 +82,7 @@ class FAQService:
         
         # Gerar embedding para a pergunta
         try:
-            embedding = await self.ai_service.generate_embeddings(question)
+            embedding = await self.ai_service.generate_embeddings(question, tenant_id=tenant)
         except Exception as e:
             logger.error(f"Erro ao gerar embedding para FAQ: {str(e)}")
             raise AIServiceError(f"Falha ao gerar embedding: {str(e)}")
@@ -140,7 +140,7 @@ class FAQService:
         
         # Gerar embedding para a query
         try:
-            query_embedding = await self.ai_service.generate_embeddings(query)
+            query_embedding = await self.ai_service.generate_embeddings(query, tenant_id=tenant)
         except Exception as e:
             logger.error(f"Erro ao gerar embedding para busca FAQ: {str(e)}")
             raise AIServiceError(f"Falha ao gerar embedding: {str(e)}")
@@ -255,7 +255,7 @@ class FAQService:
                     item["question"] = question
                     # Atualizar embedding se a pergunta mudou
                     try:
-                        item["embedding"] = await self.ai_service.generate_embeddings(question)
+                        item["embedding"] = await self.ai_service.generate_embeddings(question, tenant_id=tenant)
                     except Exception as e:
                         logger.error(f"Erro ao gerar embedding para FAQ atualizado: {str(e)}")
                         raise AIServiceError(f"Falha ao gerar embedding: {str(e)}")
@@ -430,6 +430,7 @@ class FAQService:
                 ai_response = await self.ai_service.generate_response(
                     prompt=prompt,
                     system=system,
+                    tenant_id=tenant_id,
                 )
                 
                 return {
@@ -1,19 +1,43 @@
 """
 Adaptador para integração com serviço LocalAI.
 """
-import json
+import hashlib
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any
 
 import httpx
+import orjson
+from prometheus_client import Counter, Histogram
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 
 from app.core.exceptions import AIServiceError
 from app.core.interfaces.ai_service import IAIService, AIModel, AIResponse, SearchResult
 from app.core.interfaces.cache import ICache
+from app.core.services.tenant_context import TenantContext
 
 
 logger = logging.getLogger(__name__)
 
+# Cabeçalhos compartilhados para requisições com corpo JSON pré-serializado
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Métricas de cache e latência das chamadas ao LocalAI
+CACHE_HITS = Counter("ai_cache_hits_total", "Acertos de cache do serviço de IA", ["kind"])
+CACHE_MISSES = Counter("ai_cache_misses_total", "Faltas de cache do serviço de IA", ["kind"])
+REQUEST_LATENCY = Histogram("ai_request_seconds", "Latência das requisições ao LocalAI", ["kind"])
+
+
+def _digest(value: str) -> str:
+    """Gera um hash estável (igual entre processos) para compor chaves de cache."""
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """Indica se um erro do LocalAI é transitório (timeout ou 5xx)."""
+    if isinstance(error, httpx.TimeoutException):
+        return True
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code >= 500
+
 
 class LocalAIService:
     """
@@ -26,6 +50,7 @@ class LocalAIService:
         self,
         api_url: str,
         cache: ICache,
+        tenant_context: TenantContext,
         timeout: int = 60,
     ):
         """
@@ -34,12 +59,24 @@ class LocalAIService:
         Args:
             api_url: URL da API do LocalAI.
             cache: Serviço de cache para otimizar requisições.
+            tenant_context: Contexto de tenant (isola as chaves de cache por tenant).
             timeout: Tempo limite para requisições em segundos.
         """
         self.api_url = api_url.rstrip('/')
         self.cache = cache
+        self.tenant_context = tenant_context
         self.timeout = timeout
         
+        # URLs e timeout pré-construídos para evitar parsing a cada chamada
+        self._timeout = httpx.Timeout(timeout)
+        self._completions_url = httpx.URL(f"{self.api_url}/v1/completions")
+        self._embeddings_url = httpx.URL(f"{self.api_url}/v1/embeddings")
+        self._health_url = httpx.URL(f"{self.api_url}/health")
+        self._json_headers = _JSON_HEADERS
+        
+        # Cliente HTTP compartilhado (mantém conexões abertas entre requisições)
+        self._client = httpx.AsyncClient(timeout=self._timeout)
+        
         logger.info(f"Serviço LocalAI inicializado com URL: {api_url}")
     
     async def generate_response(
@@ -49,6 +86,7 @@ class LocalAIService:
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 512,
+        tenant_id: Optional[str] = None,
     ) -> str:
         """
         Gera uma resposta de texto a partir de um prompt.
@@ -59,6 +97,7 @@ class LocalAIService:
             model: Modelo a ser usado (opcional).
             temperature: Temperatura para geração.
             max_tokens: Máximo de tokens a gerar.
+            tenant_id: ID do tenant (opcional, usa o contexto atual).
             
         Returns:
             Texto gerado.
@@ -66,69 +105,50 @@ class LocalAIService:
         Raises:
             AIServiceError: Se houver erro na geração.
         """
+        # Definir modelo padrão se não informado
+        model_name = model or AIModel.PHI3_MINI.value
+        tenant = tenant_id or self.tenant_context.tenant_id
+        
         # Verificar cache
-        cache_key = f"ai_response:{hash(f'{prompt}|{system}|{model}|{temperature}|{max_tokens}')}"
+        cache_key = f"ai_response:{tenant}:{model_name}:{_digest(f'{prompt}|{system}|{temperature}|{max_tokens}')}"
         
         cached_response = await self.cache.get(cache_key)
         if cached_response:
             logger.debug(f"Resposta obtida do cache: {cache_key[:20]}...")
+            CACHE_HITS.labels("response").inc()
             return cached_response
         
-        # Definir modelo padrão se não informado
-        model_name = model or AIModel.PHI3_MINI
+        CACHE_MISSES.labels("response").inc()
         
-        try:
-            # Preparar payload para API
-            payload = {
-                "model": model_name,
-                "prompt": prompt,
-                "temperature": temperature,
-                "max_tokens": max_tokens,
-            }
-            
-            # Adicionar system prompt se fornecido
-            if system:
-                payload["system"] = system
-            
-            # Fazer requisição
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.api_url}/v1/completions",
-                    json=payload,
-                )
-                
-                # Verificar erros de API
-                response.raise_for_status()
-                
-                # Processar resposta
-                result = response.json()
-                
-                if "choices" not in result or not result["choices"]:
-                    raise AIServiceError("Resposta inválida do serviço de IA")
-                
-                text = result["choices"][0]["text"]
-                
-                # Armazenar em cache (1 hora)
-                await self.cache.set(cache_key, text, ttl=3600)
-                
-                return text
-                
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Erro HTTP ao gerar resposta: {str(e)}")
-            raise AIServiceError(f"Erro no serviço de IA (status {e.response.status_code})")
-            
-        except httpx.TimeoutException:
-            logger.error("Timeout ao gerar resposta")
-            raise AIServiceError("Timeout na requisição ao serviço de IA")
-            
-        except Exception as e:
-            logger.error(f"Erro ao gerar resposta: {str(e)}")
-            raise AIServiceError(f"Falha ao gerar resposta: {str(e)}")
+        # Preparar payload para API
+        payload = {
+            "model": model_name,
+            "prompt": prompt,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        
+        # Adicionar system prompt se fornecido
+        if system:
+            payload["system"] = system
+        
+        result = await self._post_json(self._completions_url, payload, "response", "gerar resposta")
+        
+        if "choices" not in result or not result["choices"]:
+            raise AIServiceError("Resposta inválida do serviço de IA")
+        
+        text = result["choices"][0]["text"]
+        
+        # Armazenar em cache (1 hora)
+        await self.cache.set(cache_key, text, ttl=3600)
+        
+        return text
     
     async def generate_embeddings(
         self,
         text: str,
         model: Optional[str] = None,
+        tenant_id: Optional[str] = None,
     ) -> List[float]:
         """
         Gera embeddings (representações vetoriais) para um texto.
@@ -136,6 +156,7 @@ class LocalAIService:
         Args:
             text: Texto para gerar embeddings.
             model: Modelo a ser usado (opcional).
+            tenant_id: ID do tenant (opcional, usa o contexto atual).
             
         Returns:
             Lista de valores do vetor de embedding.
@@ -143,58 +164,125 @@ class LocalAIService:
         Raises:
             AIServiceError: Se houver erro na geração.
         """
+        # Definir modelo padrão se não informado
+        model_name = model or AIModel.ALL_MINILM.value
+        tenant = tenant_id or self.tenant_context.tenant_id
+        
         # Verificar cache
-        cache_key = f"embedding:{hash(text)}"
+        cache_key = self._embedding_key(text, model_name, tenant)
         
         cached_embedding = await self.cache.get(cache_key)
         if cached_embedding:
             logger.debug(f"Embedding obtido do cache: {cache_key[:20]}...")
+            CACHE_HITS.labels("embedding").inc()
             return cached_embedding
         
-        # Definir modelo padrão se não informado
-        model_name = model or AIModel.ALL_MINILM
+        CACHE_MISSES.labels("embedding").inc()
         
-        try:
-            # Preparar payload para API
+        # Preparar payload para API
+        payload = {
+            "model": model_name,
+            "input": text,
+        }
+        
+        result = await self._post_json(self._embeddings_url, payload, "embedding", "gerar embedding")
+        
+        if "data" not in result or not result["data"]:
+            raise AIServiceError("Resposta inválida do serviço de embeddings")
+        
+        embedding = result["data"][0]["embedding"]
+        
+        # Armazenar em cache (1 dia)
+        await self.cache.set(cache_key, embedding, ttl=86400)
+        
+        return embedding
+    
+    async def generate_embeddings_batch(
+        self,
+        texts: List[str],
+        model: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+    ) -> List[List[float]]:
+        """
+        Gera embeddings para vários textos em uma única requisição.
+        
+        Textos já presentes no cache não são reenviados ao LocalAI.
+        
+        Args:
+            texts: Textos para gerar embeddings.
+            model: Modelo a ser usado (opcional).
+            tenant_id: ID do tenant (opcional, usa o contexto atual).
+            
+        Returns:
+            Lista de vetores de embedding, na mesma ordem dos textos.
+            
+        Raises:
+            AIServiceError: Se houver erro na geração.
+        """
+        if not texts:
+            return []
+        
+        model_name = model or AIModel.ALL_MINILM.value
+        tenant = tenant_id or self.tenant_context.tenant_id
+        
+        keys = [self._embedding_key(text, model_name, tenant) for text in texts]
+        embeddings = await self.cache.get_many(keys)
+        
+        # Textos sem embedding em cache (sem duplicatas, preservando a ordem)
+        missing = list(dict.fromkeys(
+            text for text, key in zip(texts, keys) if key not in embeddings
+        ))
+        
+        CACHE_HITS.labels("embedding").inc(len(texts) - len(missing))
+        
+        if missing:
+            CACHE_MISSES.labels("embedding").inc(len(missing))
+            
             payload = {
                 "model": model_name,
-                "input": text,
+                "input": missing,
             }
             
-            # Fazer requisição
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.api_url}/v1/embeddings",
-                    json=payload,
-                )
-                
-                # Verificar erros de API
-                response.raise_for_status()
-                
-                # Processar resposta
-                result = response.json()
-                
-                if "data" not in result or not result["data"]:
-                    raise AIServiceError("Resposta inválida do serviço de embeddings")
-                
-                embedding = result["data"][0]["embedding"]
-                
-                # Armazenar em cache (1 dia)
-                await self.cache.set(cache_key, embedding, ttl=86400)
-                
-                return embedding
-                
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Erro HTTP ao gerar embedding: {str(e)}")
-            raise AIServiceError(f"Erro no serviço de embeddings (status {e.response.status_code})")
+            result = await self._post_json(self._embeddings_url, payload, "embedding", "gerar embeddings em lote")
             
-        except httpx.TimeoutException:
-            logger.error("Timeout ao gerar embedding")
-            raise AIServiceError("Timeout na requisição ao serviço de embeddings")
+            data = result.get("data") or []
+            if len(data) != len(missing):
+                raise AIServiceError("Resposta inválida do serviço de embeddings")
             
-        except Exception as e:
-            logger.error(f"Erro ao gerar embedding: {str(e)}")
-            raise AIServiceError(f"Falha ao gerar embedding: {str(e)}")
+            data = sorted(data, key=lambda item: item.get("index", 0))
+            generated = {
+                self._embedding_key(text, model_name, tenant): item["embedding"]
+                for text, item in zip(missing, data)
+            }
+            
+            # Armazenar em cache (1 dia)
+            await self.cache.set_many(generated, ttl=86400)
+            embeddings.update(generated)
+        
+        return [embeddings[key] for key in keys]
+    
+    async def warm(
+        self,
+        texts: Iterable[str],
+        model: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+    ) -> None:
+        """
+        Pré-carrega no cache os embeddings de textos usados com frequência.
+        
+        Idempotente: textos já em cache são ignorados.
+        
+        Args:
+            texts: Textos conhecidos (nomes de templates, categorias etc).
+            model: Modelo a ser usado (opcional).
+            tenant_id: ID do tenant (opcional, usa o contexto atual).
+        """
+        texts = list(dict.fromkeys(texts))
+        if not texts:
+            return
+        
+        await self.generate_embeddings_batch(texts, model, tenant_id)
+        logger.info(f"Cache de embeddings aquecido com {len(texts)} textos")
     
     async def health_check(self) -> bool:
         """
@@ -204,9 +292,85 @@ class LocalAIService:
             True se operacional, False caso contrário.
         """
         try:
-            async with httpx.AsyncClient(timeout=5) as client:
-                response = await client.get(f"{self.api_url}/health")
-                return response.status_code == 200
+            response = await self._client.get(self._health_url, timeout=5)
+            return response.status_code == 200
         except Exception as e:
             logger.warning(f"Falha no health check do serviço de IA: {str(e)}")
             return False
+    
+    def _embedding_key(self, text: str, model_name: str, tenant_id: str) -> str:
+        """
+        Monta a chave de cache do embedding de um texto.
+        
+        Args:
+            text: Texto de entrada.
+            model_name: Modelo usado para gerar o embedding.
+            tenant_id: ID do tenant dono da entrada.
+            
+        Returns:
+            Chave de cache.
+        """
+        return f"embedding:{tenant_id}:{model_name}:{_digest(text)}"
+    
+    async def _post_json(
+        self,
+        url: httpx.URL,
+        payload: Dict[str, Any],
+        kind: str,
+        error_label: str,
+    ) -> Dict[str, Any]:
+        """
+        Envia um payload JSON ao LocalAI com retentativas e retorna a resposta decodificada.
+        
+        Timeouts e erros 5xx são repetidos com backoff exponencial (com jitter)
+        antes de falhar.
+        
+        Args:
+            url: URL do endpoint.
+            payload: Corpo da requisição.
+            kind: Tipo da requisição para métricas (response, embedding).
+            error_label: Descrição da operação usada nos logs e erros.
+            
+        Returns:
+            Corpo da resposta decodificado.
+            
+        Raises:
+            AIServiceError: Se a requisição falhar após as retentativas.
+        """
+        body = orjson.dumps(payload)
+        
+        try:
+            with REQUEST_LATENCY.labels(kind).time():
+                async for attempt in AsyncRetrying(
+                    stop=stop_after_attempt(3),
+                    wait=wait_exponential_jitter(initial=0.1, max=1.0),
+                    retry=retry_if_exception(_is_retryable),
+                    reraise=True,
+                ):
+                    with attempt:
+                        response = await self._client.post(
+                            url,
+                            content=body,
+                            headers=self._json_headers,
+                        )
+                        response.raise_for_status()
+            
+            return orjson.loads(response.content)
+            
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Erro HTTP ao {error_label}: {str(e)}")
+            raise AIServiceError(f"Erro no serviço de IA (status {e.response.status_code})")
+            
+        except httpx.TimeoutException:
+            logger.error(f"Timeout ao {error_label}")
+            raise AIServiceError("Timeout na requisição ao serviço de IA")
+            
+        except Exception as e:
+            logger.error(f"Erro ao {error_label}: {str(e)}")
+            raise AIServiceError(f"Falha ao {error_label}: {str(e)}")
+    
+    async def close(self) -> None:
+        """
+        Fecha o cliente HTTP compartilhado e libera as conexões abertas.
+        """
+        await self._client.aclose()
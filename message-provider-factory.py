@@ -1,15 +1,25 @@
 """
 Factory para provedores de mensagens com suporte a fallback.
 """
+import inspect
 import logging
 from typing import Dict, List, Optional
 
+from prometheus_client import Counter
+
 from app.core.exceptions import MessagingError
-from app.core.interfaces.message_provider import IMessageProvider
+from app.core.interfaces.message_provider import IMessageProvider, MessageResponse
 
 
 logger = logging.getLogger(__name__)
 
+# Tentativas de envio por provedor e resultado (ok/fail)
+PROVIDER_ATTEMPTS = Counter(
+    "message_provider_attempts_total",
+    "Tentativas de envio por provedor de mensagem",
+    ["provider", "outcome"],
+)
+
 
 class MessageProviderFactory:
     """
@@ -88,22 +98,24 @@ class MessageProviderFactory:
         # Se não há configuração, usar todos os provedores disponíveis
         return list(self.providers.keys())
     
-    def try_with_fallback(self, tenant_id: str, send_method: callable) -> any:
+    async def try_with_fallback(self, tenant_id: str, send_method: callable) -> any:
         """
         Tenta enviar uma mensagem com fallback.
         
         Args:
             tenant_id: ID do tenant.
-            send_method: Método para enviar a mensagem, recebe o provedor como parâmetro.
+            send_method: Função assíncrona para enviar a mensagem, recebe o provedor como parâmetro.
             
         Returns:
-            Resultado do envio.
+            Resultado do envio. Se todos os provedores devolverem
+            MessageResponse com success=False, retorna a última delas.
             
         Raises:
-            MessagingError: Se todos os provedores falharem.
+            MessagingError: Se todos os provedores falharem com exceção.
         """
         fallback_order = self.get_fallback_order(tenant_id)
         last_error = None
+        last_failed_response = None
         
         # Tentar cada provedor na ordem de fallback
         for provider_id in fallback_order:
@@ -115,16 +127,48 @@ class MessageProviderFactory:
             
             try:
                 logger.debug(f"Tentando enviar com provedor {provider_id}")
-                result = send_method(provider)
-                logger.debug(f"Envio bem-sucedido com provedor {provider_id}")
-                return result
+                result = await send_method(provider)
             except Exception as e:
+                PROVIDER_ATTEMPTS.labels(provider_id, "fail").inc()
                 logger.error(f"Falha ao enviar com provedor {provider_id}: {str(e)}")
                 last_error = e
+                continue
+            
+            # Provedores como o Twilio capturam a exceção e devolvem success=False
+            if isinstance(result, MessageResponse) and not result.success:
+                PROVIDER_ATTEMPTS.labels(provider_id, "fail").inc()
+                logger.error(f"Falha ao enviar com provedor {provider_id}: {result.error}")
+                last_failed_response = result
+                continue
+            
+            PROVIDER_ATTEMPTS.labels(provider_id, "ok").inc()
+            logger.debug(f"Envio bem-sucedido com provedor {provider_id}")
+            return result
         
         # Se chegou aqui, todos os provedores falharam
+        if last_failed_response is not None:
+            return last_failed_response
         raise MessagingError(f"Todos os provedores falharam: {str(last_error)}")
     
+    async def close(self) -> None:
+        """
+        Fecha os provedores que mantêm conexões abertas (os que têm close()).
+        
+        Aceita close() síncrono ou assíncrono; a falha de um provedor é
+        registrada e não impede o fechamento dos demais.
+        """
+        for provider_id, provider in self.providers.items():
+            close = getattr(provider, "close", None)
+            if close is None:
+                continue
+            
+            try:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Erro ao fechar provedor {provider_id}: {str(e)}")
+    
     def _validate_providers(self) -> None:
         """
         Valida se a configuração de fallback usa apenas provedores disponíveis.
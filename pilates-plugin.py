@@ -2,13 +2,236 @@
 Plugin para o nicho de Pilates/Fitness.
 """
 import logging
-from typing import Dict, List, Any
+import re
+import sys
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Mapping, NamedTuple, Tuple
 
+from app.core.exceptions import PluginError
 from app.plugins.manager import NichoPlugin
 
 
 logger = logging.getLogger(__name__)
 
+# Valores repetidos em templates, campos e fluxos (um único objeto compartilhado)
+_WHATSAPP = sys.intern("whatsapp")
+_APPOINTMENT = sys.intern("appointment")
+_CLIENT = sys.intern("client")
+
+# Placeholders no formato {{variavel}}
+_PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+def _freeze(value: Any) -> Any:
+    """
+    Converte recursivamente dicts em MappingProxyType e listas em tuplas.
+    
+    Args:
+        value: Valor a congelar.
+        
+    Returns:
+        Valor imutável equivalente.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class _CompiledTemplate(NamedTuple):
+    """Template pré-compilado e o conjunto de variáveis usadas no conteúdo."""
+    
+    text: str
+    variables: FrozenSet[str]
+
+
+def _compile_template(content: str) -> _CompiledTemplate:
+    """
+    Converte um template com placeholders {{variavel}} para o formato de str.format_map.
+    
+    Chaves literais do texto são escapadas para não serem interpretadas.
+    
+    Args:
+        content: Conteúdo do template.
+        
+    Returns:
+        Template pronto para format_map e as variáveis encontradas.
+    """
+    parts = _PLACEHOLDER_RE.split(content)
+    # split alterna texto literal (posições pares) e nomes de variáveis (ímpares)
+    text = "".join(
+        "{" + part + "}" if i % 2 else part.replace("{", "{{").replace("}", "}}")
+        for i, part in enumerate(parts)
+    )
+    return _CompiledTemplate(text, frozenset(parts[1::2]))
+
+
+# Templates de mensagem do nicho (dados estáticos e imutáveis, construídos uma única vez)
+_TEMPLATES: Tuple[Mapping[str, Any], ...] = _freeze([
+    {
+        "id": "confirmacao_aula",
+        "name": "Confirmação de Aula",
+        "content": "Olá {{nome}}, confirmamos sua aula de {{modalidade}} para {{data}} às {{hora}}. Responda S para confirmar.",
+        "variables": ["nome", "modalidade", "data", "hora"],
+        "channel": _WHATSAPP,
+    },
+    {
+        "id": "lembrete_aula",
+        "name": "Lembrete de Aula",
+        "content": "Lembrete: Sua aula de {{modalidade}} está agendada para amanhã às {{hora}}. Até lá!",
+        "variables": ["modalidade", "hora"],
+        "channel": _WHATSAPP,
+    },
+    {
+        "id": "boas_vindas",
+        "name": "Boas-vindas",
+        "content": "Olá {{nome}}, bem-vindo(a) ao {{studio}}! Estamos felizes em tê-lo(a) como aluno(a). Qualquer dúvida estamos à disposição.",
+        "variables": ["nome", "studio"],
+        "channel": _WHATSAPP,
+    },
+    {
+        "id": "recuperacao_aluno",
+        "name": "Recuperação de Aluno",
+        "content": "Olá {{nome}}, sentimos sua falta nas aulas! Já faz {{dias}} dias desde sua última visita. Que tal agendar uma aula? Temos horários disponíveis para você.",
+        "variables": ["nome", "dias"],
+        "channel": _WHATSAPP,
+    },
+    {
+        "id": "aniversario",
+        "name": "Aniversário",
+        "content": "Olá {{nome}}, toda a equipe do {{studio}} deseja um feliz aniversário! Como presente, você ganhou uma aula extra este mês. Aproveite!",
+        "variables": ["nome", "studio"],
+        "channel": _WHATSAPP,
+    },
+])
+
+# Campos customizados do nicho (dados estáticos e imutáveis, construídos uma única vez)
+_FIELDS: Tuple[Mapping[str, Any], ...] = _freeze([
+    {
+        "id": "modalidade",
+        "name": "Modalidade",
+        "type": "select",
+        "entity": _APPOINTMENT,
+        "options": [
+            "Pilates Solo", 
+            "Pilates Aparelho", 
+            "Funcional", 
+            "Yoga", 
+            "Personal", 
+            "Avaliação Física"
+        ],
+        "required": True,
+    },
+    {
+        "id": "nivel",
+        "name": "Nível",
+        "type": "select",
+        "entity": _CLIENT,
+        "options": ["Iniciante", "Intermediário", "Avançado"],
+        "required": False,
+    },
+    {
+        "id": "restricoes",
+        "name": "Restrições Físicas",
+        "type": "text",
+        "entity": _CLIENT,
+        "required": False,
+    },
+    {
+        "id": "objetivo",
+        "name": "Objetivo",
+        "type": "select",
+        "entity": _CLIENT,
+        "options": [
+            "Reabilitação", 
+            "Fortalecimento", 
+            "Flexibilidade", 
+            "Postura", 
+            "Emagrecimento", 
+            "Qualidade de Vida"
+        ],
+        "multiple": True,
+        "required": False,
+    },
+    {
+        "id": "plano",
+        "name": "Plano",
+        "type": "select",
+        "entity": _CLIENT,
+        "options": [
+            "Mensal 1x", 
+            "Mensal 2x", 
+            "Mensal 3x", 
+            "Trimestral", 
+            "Semestral", 
+            "Avulso"
+        ],
+        "required": False,
+    },
+])
+
+# Fluxos de trabalho do nicho (dados estáticos e imutáveis, construídos uma única vez)
+_WORKFLOWS: Tuple[Mapping[str, Any], ...] = _freeze([
+    {
+        "id": "confirmacao_24h",
+        "name": "Confirmação 24h antes",
+        "description": "Envia mensagem de confirmação 24h antes da aula",
+        "trigger": "schedule.before_24h",
+        "enabled": True,
+        "actions": [
+            {
+                "type": "send_message",
+                "template": "confirmacao_aula",
+                "channel": _WHATSAPP,
+            }
+        ],
+    },
+    {
+        "id": "lembrete_1h",
+        "name": "Lembrete 1h antes",
+        "description": "Envia lembrete 1h antes da aula",
+        "trigger": "schedule.before_1h",
+        "enabled": True,
+        "actions": [
+            {
+                "type": "send_message",
+                "template": "lembrete_aula",
+                "channel": _WHATSAPP,
+            }
+        ],
+    },
+    {
+        "id": "recuperacao_alunos",
+        "name": "Recuperação de Alunos",
+        "description": "Envia mensagem para alunos inativos após 15 dias",
+        "trigger": "client.inactive_days",
+        "trigger_params": {"days": 15},
+        "enabled": True,
+        "actions": [
+            {
+                "type": "send_message",
+                "template": "recuperacao_aluno",
+                "channel": _WHATSAPP,
+            }
+        ],
+    },
+    {
+        "id": "aniversario_aluno",
+        "name": "Aniversário de Aluno",
+        "description": "Envia mensagem de aniversário",
+        "trigger": "client.birthday",
+        "enabled": True,
+        "actions": [
+            {
+                "type": "send_message",
+                "template": "aniversario",
+                "channel": _WHATSAPP,
+            }
+        ],
+    },
+])
+
 
 class PilatesFitnessPlugin(NichoPlugin):
     """
@@ -18,209 +241,75 @@ class PilatesFitnessPlugin(NichoPlugin):
     profissionais de Pilates e Fitness.
     """
     
-    @property
-    def id(self) -> str:
-        """ID único do plugin."""
-        return "pilates_fitness"
-    
-    @property
-    def version(self) -> str:
-        """Versão do plugin."""
-        return "1.0.0"
+    id = "pilates_fitness"
+    version = "1.0.0"
+    name = "Pilates e Fitness"
+    nicho_id = "pilates"
     
-    @property
-    def name(self) -> str:
-        """Nome amigável do plugin."""
-        return "Pilates e Fitness"
-    
-    @property
-    def nicho_id(self) -> str:
-        """ID do nicho."""
-        return "pilates"
+    def __init__(self):
+        """Inicializa o estado do plugin."""
+        self._compiled: Dict[str, _CompiledTemplate] = {}
     
     def initialize(self) -> None:
-        """Inicializa o plugin."""
+        """Inicializa o plugin, pré-compilando os templates de mensagem."""
         logger.info(f"Inicializando plugin {self.name} v{self.version}")
+        
+        for template in self.get_templates():
+            compiled = _compile_template(template["content"])
+            if compiled.variables != frozenset(template["variables"]):
+                logger.warning(
+                    f"Template {template['id']}: variáveis declaradas {sorted(template['variables'])} "
+                    f"diferem das usadas no conteúdo {sorted(compiled.variables)}"
+                )
+            self._compiled[template["id"]] = compiled
     
-    def get_templates(self) -> List[Dict[str, Any]]:
+    def render_template(self, template_id: str, context: Mapping[str, Any]) -> str:
+        """
+        Renderiza um template de mensagem com os valores informados.
+        
+        Args:
+            template_id: ID do template.
+            context: Valores das variáveis do template.
+            
+        Returns:
+            Mensagem renderizada.
+            
+        Raises:
+            PluginError: Se o template não existir ou faltar alguma variável.
+        """
+        compiled = self._compiled.get(template_id)
+        if compiled is None:
+            raise PluginError(f"Template {template_id} não encontrado no plugin {self.id}")
+        
+        missing = compiled.variables.difference(context)
+        if missing:
+            raise PluginError(f"Variáveis {', '.join(sorted(missing))} não informadas para o template {template_id}")
+        
+        return compiled.text.format_map(context)
+    
+    def get_templates(self) -> Tuple[Mapping[str, Any], ...]:
         """
         Retorna templates de mensagem específicos para Pilates/Fitness.
         
         Returns:
-            Lista de templates.
+            Tupla imutável de templates.
         """
-        return [
-            {
-                "id": "confirmacao_aula",
-                "name": "Confirmação de Aula",
-                "content": "Olá {{nome}}, confirmamos sua aula de {{modalidade}} para {{data}} às {{hora}}. Responda S para confirmar.",
-                "variables": ["nome", "modalidade", "data", "hora"],
-                "channel": "whatsapp",
-            },
-            {
-                "id": "lembrete_aula",
-                "name": "Lembrete de Aula",
-                "content": "Lembrete: Sua aula de {{modalidade}} está agendada para amanhã às {{hora}}. Até lá!",
-                "variables": ["modalidade", "hora"],
-                "channel": "whatsapp",
-            },
-            {
-                "id": "boas_vindas",
-                "name": "Boas-vindas",
-                "content": "Olá {{nome}}, bem-vindo(a) ao {{studio}}! Estamos felizes em tê-lo(a) como aluno(a). Qualquer dúvida estamos à disposição.",
-                "variables": ["nome", "studio"],
-                "channel": "whatsapp",
-            },
-            {
-                "id": "recuperacao_aluno",
-                "name": "Recuperação de Aluno",
-                "content": "Olá {{nome}}, sentimos sua falta nas aulas! Já faz {{dias}} dias desde sua última visita. Que tal agendar uma aula? Temos horários disponíveis para você.",
-                "variables": ["nome", "dias"],
-                "channel": "whatsapp",
-            },
-            {
-                "id": "aniversario",
-                "name": "Aniversário",
-                "content": "Olá {{nome}}, toda a equipe do {{studio}} deseja um feliz aniversário! Como presente, você ganhou uma aula extra este mês. Aproveite!",
-                "variables": ["nome", "studio"],
-                "channel": "whatsapp",
-            },
-        ]
+        return _TEMPLATES
     
-    def get_fields(self) -> List[Dict[str, Any]]:
+    def get_fields(self) -> Tuple[Mapping[str, Any], ...]:
         """
         Retorna campos customizados para Pilates/Fitness.
         
         Returns:
-            Lista de campos customizados.
+            Tupla imutável de campos customizados.
         """
-        return [
-            {
-                "id": "modalidade",
-                "name": "Modalidade",
-                "type": "select",
-                "entity": "appointment",
-                "options": [
-                    "Pilates Solo", 
-                    "Pilates Aparelho", 
-                    "Funcional", 
-                    "Yoga", 
-                    "Personal", 
-                    "Avaliação Física"
-                ],
-                "required": True,
-            },
-            {
-                "id": "nivel",
-                "name": "Nível",
-                "type": "select",
-                "entity": "client",
-                "options": ["Iniciante", "Intermediário", "Avançado"],
-                "required": False,
-            },
-            {
-                "id": "restricoes",
-                "name": "Restrições Físicas",
-                "type": "text",
-                "entity": "client",
-                "required": False,
-            },
-            {
-                "id": "objetivo",
-                "name": "Objetivo",
-                "type": "select",
-                "entity": "client",
-                "options": [
-                    "Reabilitação", 
-                    "Fortalecimento", 
-                    "Flexibilidade", 
-                    "Postura", 
-                    "Emagrecimento", 
-                    "Qualidade de Vida"
-                ],
-                "multiple": True,
-                "required": False,
-            },
-            {
-                "id": "plano",
-                "name": "Plano",
-                "type": "select",
-                "entity": "client",
-                "options": [
-                    "Mensal 1x", 
-                    "Mensal 2x", 
-                    "Mensal 3x", 
-                    "Trimestral", 
-                    "Semestral", 
-                    "Avulso"
-                ],
-                "required": False,
-            },
-        ]
+        return _FIELDS
     
-    def get_workflows(self) -> List[Dict[str, Any]]:
+    def get_workflows(self) -> Tuple[Mapping[str, Any], ...]:
         """
         Retorna fluxos de trabalho específicos para Pilates/Fitness.
         
         Returns:
-            Lista de fluxos de trabalho.
+            Tupla imutável de fluxos de trabalho.
         """
-        return [
-            {
-                "id": "confirmacao_24h",
-                "name": "Confirmação 24h antes",
-                "description": "Envia mensagem de confirmação 24h antes da aula",
-                "trigger": "schedule.before_24h",
-                "enabled": True,
-                "actions": [
-                    {
-                        "type": "send_message",
-                        "template": "confirmacao_aula",
-                        "channel": "whatsapp",
-                    }
-                ],
-            },
-            {
-                "id": "lembrete_1h",
-                "name": "Lembrete 1h antes",
-                "description": "Envia lembrete 1h antes da aula",
-                "trigger": "schedule.before_1h",
-                "enabled": True,
-                "actions": [
-                    {
-                        "type": "send_message",
-                        "template": "lembrete_aula",
-                        "channel": "whatsapp",
-                    }
-                ],
-            },
-            {
-                "id": "recuperacao_alunos",
-                "name": "Recuperação de Alunos",
-                "description": "Envia mensagem para alunos inativos após 15 dias",
-                "trigger": "client.inactive_days",
-                "trigger_params": {"days": 15},
-                "enabled": True,
-                "actions": [
-                    {
-                        "type": "send_message",
-                        "template": "recuperacao_aluno",
-                        "channel": "whatsapp",
-                    }
-                ],
-            },
-            {
-                "id": "aniversario_aluno",
-                "name": "Aniversário de Aluno",
-                "description": "Envia mensagem de aniversário",
-                "trigger": "client.birthday",
-                "enabled": True,
-                "actions": [
-                    {
-                        "type": "send_message",
-                        "template": "aniversario",
-                        "channel": "whatsapp",
-                    }
-                ],
-            },
-        ]
+        return _WORKFLOWS
@@ -1,40 +1,38 @@
 """
 Gerenciador de plugins para extensão do sistema.
 """
+import abc
+import functools
 import importlib
-import inspect
+import importlib.util
+import json
 import logging
 import os
 import pkgutil
-from typing import Any, Dict, List, Optional, Set, Type
+import sys
+from typing import Any, ClassVar, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Type
 
 from app.core.exceptions import InvalidPluginError, PluginNotFoundError
 
 
 logger = logging.getLogger(__name__)
 
+# Manifesto com as classes de plugin por tipo (gerado por discover_plugins)
+DEFAULT_MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugin_manifest.json")
 
-class Plugin:
+
+class Plugin(abc.ABC):
     """
     Classe base para todos os plugins do sistema.
     
     Define a interface comum que todos os plugins devem implementar.
+    Os metadados são atributos de classe que toda subclasse deve definir
+    (validados em PluginManager.register_plugin).
     """
     
-    @property
-    def id(self) -> str:
-        """ID único do plugin."""
-        raise NotImplementedError("Todo plugin deve implementar id")
-    
-    @property
-    def version(self) -> str:
-        """Versão do plugin."""
-        raise NotImplementedError("Todo plugin deve implementar version")
-    
-    @property
-    def name(self) -> str:
-        """Nome amigável do plugin."""
-        raise NotImplementedError("Todo plugin deve implementar name")
+    id: ClassVar[str]       # ID único do plugin
+    version: ClassVar[str]  # Versão do plugin
+    name: ClassVar[str]     # Nome amigável do plugin
     
     def initialize(self) -> None:
         """Inicializa o plugin."""
@@ -49,12 +47,9 @@ class NichoPlugin(Plugin):
     (ex: Pilates, Psicologia, Nutrição).
     """
     
-    @property
-    def nicho_id(self) -> str:
-        """ID do nicho."""
-        raise NotImplementedError("Todo plugin de nicho deve implementar nicho_id")
+    nicho_id: ClassVar[str]  # ID do nicho
     
-    def get_templates(self) -> List[Dict[str, Any]]:
+    def get_templates(self) -> Sequence[Mapping[str, Any]]:
         """
         Retorna templates de mensagem específicos do nicho.
         
@@ -63,7 +58,7 @@ class NichoPlugin(Plugin):
         """
         return []
     
-    def get_fields(self) -> List[Dict[str, Any]]:
+    def get_fields(self) -> Sequence[Mapping[str, Any]]:
         """
         Retorna campos customizados para o nicho.
         
@@ -72,7 +67,7 @@ class NichoPlugin(Plugin):
         """
         return []
     
-    def get_workflows(self) -> List[Dict[str, Any]]:
+    def get_workflows(self) -> Sequence[Mapping[str, Any]]:
         """
         Retorna fluxos de trabalho específicos do nicho.
         
@@ -82,6 +77,72 @@ class NichoPlugin(Plugin):
         return []
 
 
+# Tipos de plugin suportados
+_PLUGIN_TYPES: FrozenSet[str] = frozenset({"nicho", "integration", "workflow", "theme"})
+
+# Classe base esperada por tipo de plugin (tipos sem base própria usam Plugin)
+_TYPE_TO_BASE: Dict[str, Type[Plugin]] = {
+    "nicho": NichoPlugin,
+}
+
+# Atributos de classe obrigatórios por tipo de plugin
+_BASE_ATTRS: Tuple[str, ...] = ("id", "version", "name")
+_REQUIRED_ATTRS: Dict[str, Tuple[str, ...]] = {
+    "nicho": _BASE_ATTRS + ("nicho_id",),
+}
+
+# Classes base que nunca são instanciadas como plugins
+_BASE_CLASSES: Set[Type[Plugin]] = {Plugin, *_TYPE_TO_BASE.values()}
+
+
+def _all_subclasses(cls: Type[Plugin]) -> List[Type[Plugin]]:
+    """
+    Retorna todas as subclasses (diretas e indiretas) de uma classe.
+    
+    Args:
+        cls: Classe raiz.
+        
+    Returns:
+        Lista de subclasses.
+    """
+    result = []
+    seen = set()
+    stack = [cls]
+    
+    while stack:
+        for subclass in stack.pop().__subclasses__():
+            if subclass not in seen:
+                seen.add(subclass)
+                result.append(subclass)
+                stack.append(subclass)
+    
+    return result
+
+
+@functools.lru_cache(maxsize=None)
+def _validate_cls(plugin_type: str, cls: type) -> bool:
+    """
+    Valida se uma classe implementa a interface do tipo de plugin.
+    
+    O resultado depende apenas do par (tipo, classe) e fica em cache.
+    
+    Args:
+        plugin_type: Tipo do plugin.
+        cls: Classe do plugin.
+        
+    Returns:
+        True se válida, False caso contrário.
+    """
+    # Tipos sem base própria só precisam implementar a interface básica
+    if not issubclass(cls, _TYPE_TO_BASE.get(plugin_type, Plugin)):
+        return False
+    
+    return all(
+        getattr(cls, attr, None) is not None
+        for attr in _REQUIRED_ATTRS.get(plugin_type, _BASE_ATTRS)
+    )
+
+
 class PluginManager:
     """
     Gerenciador de plugins do sistema.
@@ -94,7 +155,13 @@ class PluginManager:
         """Inicializa o gerenciador de plugins."""
         self._plugins: Dict[str, Dict[str, Plugin]] = {}
         self._plugin_instances: Dict[str, Plugin] = {}
-        self._plugin_types: Set[str] = {"nicho", "integration", "workflow", "theme"}
+        # Índices secundários, atualizados em register_plugin
+        self._nicho_index: Dict[str, NichoPlugin] = {}
+        self._by_type_cache: Dict[str, Tuple[Plugin, ...]] = {}
+        self._plugin_classes_cache: Dict[Tuple[str, str], List[Type[Plugin]]] = {}
+        
+        # Plugins de nicho do manifesto ainda não carregados: nicho_id -> (módulo, classe)
+        self._pending_nicho: Dict[str, Tuple[Any, str]] = {}
         
         logger.info("Gerenciador de plugins inicializado")
     
@@ -109,17 +176,98 @@ class PluginManager:
         Raises:
             InvalidPluginError: Se o plugin não implementar a interface correta.
         """
-        plugin_id = plugin.id
+        plugin_id = getattr(plugin, "id", None)
+        
+        self._check_plugin(plugin_type, plugin)
+        self._store_plugin(plugin_type, plugin)
+        
+        # Inicializar plugin
+        try:
+            plugin.initialize()
+            logger.info(f"Plugin registrado: {plugin.name} ({plugin_id}) v{plugin.version}")
+        except Exception as e:
+            logger.error(f"Erro ao inicializar plugin {plugin_id}: {str(e)}")
+            # Manter o plugin registrado mesmo com erro na inicialização
+    
+    def register_plugins(self, items: Iterable[Tuple[str, Plugin]]) -> List[Plugin]:
+        """
+        Registra vários plugins de uma vez.
+        
+        Valida todos, registra os válidos e inicializa cada um, emitindo uma
+        única linha de log com o resumo e outra com os erros acumulados, em
+        vez de uma linha por plugin. Plugins inválidos são ignorados; plugins
+        que falham na inicialização continuam registrados (como em
+        register_plugin). Se o lote tiver IDs repetidos, vale a última
+        ocorrência.
+        
+        Args:
+            items: Pares (tipo do plugin, instância).
+            
+        Returns:
+            Plugins registrados.
+        """
+        by_id: Dict[str, Tuple[str, Plugin]] = {}
+        errors: List[str] = []
+        
+        for plugin_type, plugin in items:
+            try:
+                self._check_plugin(plugin_type, plugin)
+            except InvalidPluginError as e:
+                errors.append(str(e))
+                continue
+            
+            # Mesmo ID repetido no lote (ex.: manifesto + walk_packages): vale o último
+            if plugin.id in by_id:
+                logger.warning(f"Plugin {plugin.id} repetido no lote, usando a última ocorrência (versão {plugin.version})")
+            by_id[plugin.id] = (plugin_type, plugin)
+        
+        valid = list(by_id.values())
+        
+        for plugin_type, plugin in valid:
+            self._store_plugin(plugin_type, plugin)
+        
+        for _, plugin in valid:
+            try:
+                plugin.initialize()
+            except Exception as e:
+                errors.append(f"Erro ao inicializar plugin {plugin.id}: {str(e)}")
+        
+        if valid:
+            ids = ", ".join(f"{plugin.id} v{plugin.version}" for _, plugin in valid)
+            logger.info(f"{len(valid)} plugins registrados: {ids}")
+        if errors:
+            logger.error(f"Erros ao registrar plugins: {'; '.join(errors)}")
+        
+        return [plugin for _, plugin in valid]
+    
+    def _check_plugin(self, plugin_type: str, plugin: Plugin) -> None:
+        """
+        Valida tipo e interface de um plugin antes do registro.
         
-        # Validar tipo de plugin
-        if plugin_type not in self._plugin_types:
+        Args:
+            plugin_type: Tipo do plugin.
+            plugin: Instância do plugin.
+            
+        Raises:
+            InvalidPluginError: Se o tipo for desconhecido ou a interface inválida.
+        """
+        if plugin_type not in _PLUGIN_TYPES:
             raise InvalidPluginError(f"Tipo de plugin desconhecido: {plugin_type}")
         
-        # Validar contrato da interface
         if not self._validate_plugin_interface(plugin_type, plugin):
+            plugin_id = getattr(plugin, "id", None)
             raise InvalidPluginError(f"Plugin {plugin_id} não implementa interface {plugin_type}")
+    
+    def _store_plugin(self, plugin_type: str, plugin: Plugin) -> None:
+        """
+        Insere um plugin já validado nos índices, substituindo o de mesmo ID.
+        
+        Args:
+            plugin_type: Tipo do plugin.
+            plugin: Instância do plugin.
+        """
+        plugin_id = plugin.id
         
-        # Registrar plugin
         if plugin_type not in self._plugins:
             self._plugins[plugin_type] = {}
             
@@ -128,16 +276,15 @@ class PluginManager:
             existente = self._plugin_instances[plugin_id]
             logger.warning(f"Plugin {plugin_id} já registrado (versão {existente.version}), substituindo por versão {plugin.version}")
             
+            if isinstance(existente, NichoPlugin) and self._nicho_index.get(existente.nicho_id) is existente:
+                del self._nicho_index[existente.nicho_id]
+            
         self._plugins[plugin_type][plugin_id] = plugin
         self._plugin_instances[plugin_id] = plugin
+        self._by_type_cache.pop(plugin_type, None)
         
-        # Inicializar plugin
-        try:
-            plugin.initialize()
-            logger.info(f"Plugin registrado: {plugin.name} ({plugin_id}) v{plugin.version}")
-        except Exception as e:
-            logger.error(f"Erro ao inicializar plugin {plugin_id}: {str(e)}")
-            # Manter o plugin registrado mesmo com erro na inicialização
+        if plugin_type == "nicho":
+            self._nicho_index[plugin.nicho_id] = plugin
     
     def get_plugin(self, plugin_id: str) -> Optional[Plugin]:
         """
@@ -151,7 +298,7 @@ class PluginManager:
         """
         return self._plugin_instances.get(plugin_id)
     
-    def get_plugins_by_type(self, plugin_type: str) -> List[Plugin]:
+    def get_plugins_by_type(self, plugin_type: str) -> Tuple[Plugin, ...]:
         """
         Retorna todos os plugins de um tipo.
         
@@ -159,9 +306,15 @@ class PluginManager:
             plugin_type: Tipo do plugin.
             
         Returns:
-            Lista de plugins do tipo especificado.
+            Tupla com os plugins do tipo especificado. A mesma tupla é
+            reaproveitada até o próximo registro de um plugin do tipo; quem
+            precisar de uma lista mutável deve copiá-la (list(...)).
         """
-        return list(self._plugins.get(plugin_type, {}).values())
+        plugins = self._by_type_cache.get(plugin_type)
+        if plugins is None:
+            plugins = tuple(self._plugins.get(plugin_type, {}).values())
+            self._by_type_cache[plugin_type] = plugins
+        return plugins
     
     def get_nicho_plugin(self, nicho_id: str) -> Optional[NichoPlugin]:
         """
@@ -173,18 +326,75 @@ class PluginManager:
         Returns:
             O plugin do nicho ou None.
         """
-        plugins = self.get_plugins_by_type("nicho")
-        for plugin in plugins:
-            if isinstance(plugin, NichoPlugin) and plugin.nicho_id == nicho_id:
-                return plugin
-        return None
+        plugin = self._nicho_index.get(nicho_id)
+        if plugin is None and nicho_id in self._pending_nicho:
+            plugin = self._load_pending_nicho(nicho_id)
+        return plugin
+    
+    def discover_plugins_fast(self, manifest_path: str = DEFAULT_MANIFEST_PATH, lazy: bool = False) -> bool:
+        """
+        Registra plugins a partir do manifesto gerado por discover_plugins.
+        
+        Importa apenas os módulos listados no manifesto, sem varrer o disco
+        nem inspecionar os módulos.
+        
+        Com lazy=True, os módulos de plugins de nicho são preparados com
+        importlib.util.LazyLoader e só executados (e o plugin registrado) na
+        primeira chamada a get_nicho_plugin para o nicho. Até lá, esses
+        plugins não aparecem em get_plugin/get_plugins_by_type.
+        
+        Args:
+            manifest_path: Caminho do manifesto JSON.
+            lazy: Adia o carregamento dos plugins de nicho até o primeiro uso.
+            
+        Returns:
+            True se o manifesto foi carregado, False se não existe ou é inválido
+            (nesse caso use discover_plugins).
+        """
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as manifest_file:
+                manifest: Dict[str, List[Dict[str, str]]] = json.load(manifest_file)
+        except FileNotFoundError:
+            logger.info(f"Manifesto de plugins não encontrado: {manifest_path}")
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Manifesto de plugins inválido ({manifest_path}): {str(e)}")
+            return False
+        
+        items: List[Tuple[str, Plugin]] = []
+        
+        for plugin_type, entries in manifest.items():
+            for entry in entries:
+                try:
+                    if lazy and plugin_type == "nicho" and "nicho_id" in entry:
+                        module = self._import_lazy(entry["module"])
+                        self._pending_nicho[entry["nicho_id"]] = (module, entry["class"])
+                        continue
+                    
+                    module = importlib.import_module(entry["module"])
+                    plugin_class = getattr(module, entry["class"])
+                    items.append((plugin_type, plugin_class()))
+                except Exception as e:
+                    logger.error(f"Erro ao carregar plugin do manifesto {entry}: {str(e)}")
+        
+        self.register_plugins(items)
+        return True
     
-    def discover_plugins(self, plugins_package: str = "app.plugins") -> None:
+    def discover_plugins(
+        self,
+        plugins_package: str = "app.plugins",
+        manifest_path: Optional[str] = None,
+    ) -> None:
         """
         Descobre automaticamente e registra plugins disponíveis.
         
+        Percorre o pacote em uma única passada (pkgutil.walk_packages) e,
+        se manifest_path for informado, grava o manifesto usado por
+        discover_plugins_fast nas próximas inicializações.
+        
         Args:
             plugins_package: Pacote base para buscar plugins.
+            manifest_path: Caminho para gravar o manifesto (opcional).
         """
         logger.info(f"Descobrindo plugins em {plugins_package}")
         
@@ -197,50 +407,118 @@ class PluginManager:
                 logger.warning(f"Pacote {plugins_package} não tem subpacotes")
                 return
             
-            # Buscar subpacotes
-            for _, name, is_pkg in pkgutil.iter_modules(package_path):
-                if is_pkg:
-                    self._discover_plugins_in_package(f"{plugins_package}.{name}")
+            prefix = f"{plugins_package}."
+            items: List[Tuple[str, Plugin]] = []
+            # id(plugin) -> módulo de origem, para o manifesto
+            origins: Dict[int, str] = {}
+            
+            for _, module_name, is_pkg in pkgutil.walk_packages(
+                package_path, prefix, onerror=lambda name: logger.error(f"Erro ao importar pacote {name}")
+            ):
+                # Plugins ficam em módulos diretamente dentro do pacote do tipo
+                # (ex: app.plugins.nicho.pilates)
+                parts = module_name[len(prefix):].split(".")
+                if is_pkg or len(parts) != 2 or parts[0] not in _PLUGIN_TYPES:
+                    continue
+                
+                plugin_type = parts[0]
+                for plugin in self._load_plugin_from_module(module_name, plugin_type):
+                    items.append((plugin_type, plugin))
+                    origins[id(plugin)] = module_name
+            
+            registered = {id(plugin) for plugin in self.register_plugins(items)}
+            manifest: Dict[str, List[Dict[str, str]]] = {}
+            for plugin_type, plugin in items:
+                if id(plugin) not in registered:
+                    continue
+                entry = {"module": origins[id(plugin)], "class": type(plugin).__name__}
+                if isinstance(plugin, NichoPlugin):
+                    entry["nicho_id"] = plugin.nicho_id
+                manifest.setdefault(plugin_type, []).append(entry)
+            
+            if manifest_path:
+                self._write_manifest(manifest_path, manifest)
         except Exception as e:
             logger.error(f"Erro ao descobrir plugins: {str(e)}")
     
-    def _discover_plugins_in_package(self, package_name: str) -> None:
+    def _write_manifest(self, manifest_path: str, manifest: Dict[str, List[Dict[str, str]]]) -> None:
         """
-        Descobre plugins em um pacote específico.
+        Grava o manifesto de plugins descobertos.
         
         Args:
-            package_name: Nome do pacote para buscar.
+            manifest_path: Caminho do arquivo.
+            manifest: Classes de plugin por tipo.
         """
         try:
-            # Determinar tipo de plugin pelo nome do pacote
-            plugin_type = package_name.split(".")[-1]
-            
-            # Se não for um tipo válido, pular
-            if plugin_type not in self._plugin_types:
-                return
+            with open(manifest_path, "w", encoding="utf-8") as manifest_file:
+                json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+            logger.info(f"Manifesto de plugins gravado em {manifest_path}")
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o manifesto de plugins: {str(e)}")
+    
+    def _import_lazy(self, module_name: str) -> Any:
+        """
+        Prepara um módulo cujo código só é executado no primeiro acesso a um atributo.
+        
+        Args:
+            module_name: Nome do módulo.
             
-            # Importar o pacote
-            package = importlib.import_module(package_name)
+        Returns:
+            Módulo (possivelmente ainda não executado).
             
-            # Buscar por módulos no pacote
-            package_path = getattr(package, "__path__", None)
-            if not package_path:
-                return
+        Raises:
+            ImportError: Se o módulo não for encontrado.
+        """
+        module = sys.modules.get(module_name)
+        if module is not None:
+            return module
+        
+        spec = importlib.util.find_spec(module_name)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"Módulo {module_name} não encontrado")
+        
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        loader.exec_module(module)
+        return module
+    
+    def _load_pending_nicho(self, nicho_id: str) -> Optional[NichoPlugin]:
+        """
+        Carrega e registra um plugin de nicho adiado por discover_plugins_fast.
+        
+        Args:
+            nicho_id: ID do nicho.
             
-            for _, name, _ in pkgutil.iter_modules(package_path):
-                module_name = f"{package_name}.{name}"
-                self._load_plugin_from_module(module_name, plugin_type)
+        Returns:
+            O plugin do nicho ou None se o carregamento falhar.
+        """
+        module, class_name = self._pending_nicho.pop(nicho_id)
+        
+        try:
+            # O acesso à classe executa o módulo de fato
+            plugin_class = getattr(module, class_name)
+            self.register_plugin("nicho", plugin_class())
         except Exception as e:
-            logger.error(f"Erro ao descobrir plugins em {package_name}: {str(e)}")
+            logger.error(f"Erro ao carregar plugin do nicho {nicho_id}: {str(e)}")
+            return None
+        
+        return self._nicho_index.get(nicho_id)
     
-    def _load_plugin_from_module(self, module_name: str, plugin_type: str) -> None:
+    def _load_plugin_from_module(self, module_name: str, plugin_type: str) -> List[Plugin]:
         """
-        Carrega plugins de um módulo.
+        Instancia os plugins de um módulo (o registro fica com register_plugins).
         
         Args:
             module_name: Nome do módulo.
             plugin_type: Tipo de plugin esperado.
+            
+        Returns:
+            Plugins instanciados com sucesso.
         """
+        instances = []
+        
         try:
             # Importar o módulo
             module = importlib.import_module(module_name)
@@ -248,15 +526,16 @@ class PluginManager:
             # Buscar classes que são plugins
             plugin_classes = self._find_plugin_classes(module, plugin_type)
             
-            # Instanciar e registrar cada plugin
+            # Instanciar cada plugin
             for plugin_class in plugin_classes:
                 try:
-                    plugin_instance = plugin_class()
-                    self.register_plugin(plugin_type, plugin_instance)
+                    instances.append(plugin_class())
                 except Exception as e:
                     logger.error(f"Erro ao instanciar plugin da classe {plugin_class.__name__}: {str(e)}")
         except Exception as e:
             logger.error(f"Erro ao carregar plugin do módulo {module_name}: {str(e)}")
+        
+        return instances
     
     def _find_plugin_classes(self, module: Any, plugin_type: str) -> List[Type[Plugin]]:
         """
@@ -269,21 +548,25 @@ class PluginManager:
         Returns:
             Lista de classes de plugin.
         """
-        result = []
+        cache_key = (module.__name__, plugin_type)
+        cached = self._plugin_classes_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        for name, obj in inspect.getmembers(module, inspect.isclass):
-            # Pular classes importadas de outros módulos
-            if obj.__module__ != module.__name__:
-                continue
-            
-            # Verificar se é um plugin do tipo correto
-            if plugin_type == "nicho" and issubclass(obj, NichoPlugin) and obj != NichoPlugin:
-                result.append(obj)
-            elif issubclass(obj, Plugin) and obj != Plugin and obj != NichoPlugin:
-                # Para outros tipos, verificar pelo nome da classe
-                if plugin_type.capitalize() in name:
-                    result.append(obj)
+        base = _TYPE_TO_BASE.get(plugin_type, Plugin)
+        
+        # Classes de outros tipos com base própria não pertencem a este tipo
+        other_bases = tuple(b for t, b in _TYPE_TO_BASE.items() if t != plugin_type)
         
+        result = [
+            cls for cls in _all_subclasses(base)
+            # Pular classes definidas em outros módulos e as classes base
+            if cls.__module__ == module.__name__
+            and cls not in _BASE_CLASSES
+            and not (other_bases and issubclass(cls, other_bases))
+        ]
+        
+        self._plugin_classes_cache[cache_key] = result
         return result
     
     def _validate_plugin_interface(self, plugin_type: str, plugin: Any) -> bool:
@@ -297,13 +580,4 @@ class PluginManager:
         Returns:
             True se válido, False caso contrário.
         """
-        # Verificar interface básica de Plugin
-        if not isinstance(plugin, Plugin):
-            return False
-        
-        # Verificar interfaces específicas
-        if plugin_type == "nicho":
-            return isinstance(plugin, NichoPlugin)
-        
-        # Por enquanto, outros tipos só precisam implementar a interface básica
-        return True
+        return _validate_cls(plugin_type, type(plugin))
@@ -1,11 +1,14 @@
 """
 Entidade de Profissional (Professional) no domínio central.
 """
+import bisect
 from dataclasses import dataclass, field
 from datetime import datetime, time
 from enum import Enum
-from typing import Dict, List, Optional, Set
-from uuid import UUID, uuid4
+from typing import Any, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from app.core.entities.ids import next_uuid
 
 
 class ProfessionalStatus(str, Enum):
@@ -16,7 +19,23 @@ class ProfessionalStatus(str, Enum):
     ON_LEAVE = "on_leave"    # Profissional em licença temporária
 
 
-@dataclass
+def days_to_mask(days: Iterable[int]) -> int:
+    """
+    Converte dias da semana em uma máscara de bits.
+    
+    Args:
+        days: Dias da semana (0 = Segunda, 6 = Domingo).
+        
+    Returns:
+        Máscara com o bit de cada dia ligado.
+    """
+    mask = 0
+    for day in days:
+        mask |= 1 << day
+    return mask
+
+
+@dataclass(slots=True)
 class WorkingHours:
     """Horário de trabalho para um dia da semana."""
     
@@ -27,16 +46,16 @@ class WorkingHours:
     break_end: Optional[time] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Speciality:
     """Especialidade de um profissional."""
     
     name: str
     description: Optional[str] = None
-    id: UUID = field(default_factory=uuid4)
+    id: UUID = field(default_factory=next_uuid)
 
 
-@dataclass
+@dataclass(slots=True)
 class TimeOff:
     """Período de folga ou indisponibilidade."""
     
@@ -47,7 +66,7 @@ class TimeOff:
     recurrence_rule: Optional[str] = None  # Regra iCal para recorrência
 
 
-@dataclass
+@dataclass(slots=True)
 class Professional:
     """
     Entidade de Profissional.
@@ -63,68 +82,142 @@ class Professional:
     time_off: List[TimeOff] = field(default_factory=list)
     bio: Optional[str] = None
     status: ProfessionalStatus = ProfessionalStatus.ACTIVE
-    custom_fields: Dict[str, any] = field(default_factory=dict)
+    custom_fields: Dict[str, Any] = field(default_factory=dict)
     color: Optional[str] = None  # Cor para calendário
-    id: UUID = field(default_factory=uuid4)
+    id: UUID = field(default_factory=next_uuid)
     user_id: Optional[UUID] = None  # Referência ao usuário de sistema
     tenant_id: str = field(default="")
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: Optional[datetime] = None
     
-    def activate(self) -> None:
-        """Ativa o profissional."""
+    # Índice de horários por dia da semana, ordenados por start_time
+    # (mantido junto com working_hours)
+    _by_day: Dict[int, List[WorkingHours]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Horários de início de cada dia, paralelos a _by_day (para bisect)
+    _by_day_starts: Dict[int, List[time]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Bit d ligado se o profissional trabalha no dia d (0 = Segunda)
+    _days_mask: int = field(default=0, init=False, repr=False, compare=False)
+    # Nomes das especialidades em minúsculas, para busca sem varrer a lista
+    _speciality_names_lc: Set[str] = field(default_factory=set, init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        """Constrói os índices a partir dos dados iniciais."""
+        self._speciality_names_lc.update(s.name.lower() for s in self.specialities)
+        for wh in self.working_hours:
+            self._index_working_hours(wh)
+    
+    def activate(self, now: Optional[datetime] = None) -> None:
+        """
+        Ativa o profissional.
+        
+        Args:
+            now: Timestamp da alteração (opcional, usa o horário atual).
+        """
         self.status = ProfessionalStatus.ACTIVE
-        self.updated_at = datetime.now()
+        self._touch(now)
     
-    def deactivate(self) -> None:
-        """Desativa o profissional."""
+    def deactivate(self, now: Optional[datetime] = None) -> None:
+        """
+        Desativa o profissional.
+        
+        Args:
+            now: Timestamp da alteração (opcional, usa o horário atual).
+        """
         self.status = ProfessionalStatus.INACTIVE
-        self.updated_at = datetime.now()
+        self._touch(now)
     
-    def set_on_leave(self) -> None:
-        """Marca o profissional como em licença."""
+    def set_on_leave(self, now: Optional[datetime] = None) -> None:
+        """
+        Marca o profissional como em licença.
+        
+        Args:
+            now: Timestamp da alteração (opcional, usa o horário atual).
+        """
         self.status = ProfessionalStatus.ON_LEAVE
-        self.updated_at = datetime.now()
+        self._touch(now)
     
-    def add_speciality(self, speciality: Speciality) -> None:
+    def add_speciality(self, speciality: Speciality, now: Optional[datetime] = None) -> None:
         """
         Adiciona uma especialidade ao profissional.
         
         Args:
             speciality: Especialidade a adicionar.
+            now: Timestamp da alteração (opcional, usa o horário atual).
         """
         self.specialities.append(speciality)
-        self.updated_at = datetime.now()
+        self._speciality_names_lc.add(speciality.name.lower())
+        self._touch(now)
     
-    def add_working_hours(self, working_hours: WorkingHours) -> None:
+    def add_specialities(self, specialities: Iterable[Speciality], now: Optional[datetime] = None) -> None:
+        """
+        Adiciona várias especialidades, atualizando o timestamp uma única vez.
+        
+        Args:
+            specialities: Especialidades a adicionar.
+            now: Timestamp da alteração (opcional, usa o horário atual).
+        """
+        for speciality in specialities:
+            self.specialities.append(speciality)
+            self._speciality_names_lc.add(speciality.name.lower())
+        self._touch(now)
+    
+    def add_working_hours(self, working_hours: WorkingHours, now: Optional[datetime] = None) -> None:
         """
         Adiciona um horário de trabalho.
         
         Args:
             working_hours: Horário a adicionar.
+            now: Timestamp da alteração (opcional, usa o horário atual).
         """
         self.working_hours.append(working_hours)
-        self.updated_at = datetime.now()
+        self._index_working_hours(working_hours)
+        self._touch(now)
     
-    def add_time_off(self, time_off: TimeOff) -> None:
+    def add_working_hours_bulk(self, working_hours: Iterable[WorkingHours], now: Optional[datetime] = None) -> None:
+        """
+        Adiciona vários horários de trabalho, atualizando o timestamp uma única vez.
+        
+        Args:
+            working_hours: Horários a adicionar.
+            now: Timestamp da alteração (opcional, usa o horário atual).
+        """
+        for wh in working_hours:
+            self.working_hours.append(wh)
+            self._index_working_hours(wh)
+        self._touch(now)
+    
+    def add_time_off(self, time_off: TimeOff, now: Optional[datetime] = None) -> None:
         """
         Adiciona um período de folga.
         
         Args:
             time_off: Período a adicionar.
+            now: Timestamp da alteração (opcional, usa o horário atual).
         """
         self.time_off.append(time_off)
-        self.updated_at = datetime.now()
+        self._touch(now)
+    
+    def add_time_off_bulk(self, time_off: Iterable[TimeOff], now: Optional[datetime] = None) -> None:
+        """
+        Adiciona vários períodos de folga, atualizando o timestamp uma única vez.
+        
+        Args:
+            time_off: Períodos a adicionar.
+            now: Timestamp da alteração (opcional, usa o horário atual).
+        """
+        self.time_off.extend(time_off)
+        self._touch(now)
     
-    def update_custom_fields(self, fields: Dict[str, any]) -> None:
+    def update_custom_fields(self, fields: Dict[str, Any], now: Optional[datetime] = None) -> None:
         """
         Atualiza campos customizados do profissional.
         
         Args:
             fields: Dicionário com campos a atualizar.
+            now: Timestamp da alteração (opcional, usa o horário atual).
         """
         self.custom_fields.update(fields)
-        self.updated_at = datetime.now()
+        self._touch(now)
     
     def is_active(self) -> bool:
         """
@@ -145,7 +238,7 @@ class Professional:
         Returns:
             True se tem a especialidade, False caso contrário.
         """
-        return any(s.name.lower() == speciality_name.lower() for s in self.specialities)
+        return speciality_name.lower() in self._speciality_names_lc
     
     def works_on_day(self, day_of_week: int) -> bool:
         """
@@ -157,7 +250,19 @@ class Professional:
         Returns:
             True se trabalha no dia, False caso contrário.
         """
-        return any(wh.day_of_week == day_of_week for wh in self.working_hours)
+        return bool(self._days_mask & (1 << day_of_week))
+    
+    def works_on_days(self, days_mask: int) -> bool:
+        """
+        Verifica se o profissional trabalha em algum dos dias de uma máscara.
+        
+        Args:
+            days_mask: Máscara de dias (ver days_to_mask).
+            
+        Returns:
+            True se trabalha em pelo menos um dos dias, False caso contrário.
+        """
+        return bool(self._days_mask & days_mask)
     
     def get_working_hours_for_day(self, day_of_week: int) -> List[WorkingHours]:
         """
@@ -167,6 +272,70 @@ class Professional:
             day_of_week: Dia da semana (0 = Segunda, 6 = Domingo).
             
         Returns:
-            Lista de horários de trabalho para o dia.
+            Lista de horários de trabalho para o dia, ordenada pelo horário de
+            início (cópia; use add_working_hours para incluir novos horários).
+        """
+        return list(self._by_day.get(day_of_week, ()))
+    
+    def covers(self, day_of_week: int, at: time) -> bool:
+        """
+        Verifica se um horário está dentro do expediente do profissional.
+        
+        Considera o horário coberto se estiver em algum turno do dia
+        (início inclusivo, fim exclusivo) e fora do intervalo desse turno.
+        
+        Args:
+            day_of_week: Dia da semana (0 = Segunda, 6 = Domingo).
+            at: Horário a verificar.
+            
+        Returns:
+            True se o horário está no expediente, False caso contrário.
         """
-        return [wh for wh in self.working_hours if wh.day_of_week == day_of_week]
+        starts = self._by_day_starts.get(day_of_week)
+        if not starts:
+            return False
+        
+        hours = self._by_day[day_of_week]
+        
+        # Turnos candidatos são os que começam até "at"; o último é o mais
+        # provável, os anteriores só importam quando há sobreposição
+        for i in range(bisect.bisect_right(starts, at) - 1, -1, -1):
+            wh = hours[i]
+            if at < wh.end_time:
+                if wh.break_start and wh.break_end and wh.break_start <= at < wh.break_end:
+                    continue
+                return True
+        
+        return False
+    
+    def _touch(self, now: Optional[datetime] = None) -> datetime:
+        """
+        Atualiza o timestamp de modificação.
+        
+        Permite compartilhar um único datetime.now() entre várias alterações.
+        
+        Args:
+            now: Timestamp a usar (opcional, usa o horário atual).
+            
+        Returns:
+            Timestamp aplicado.
+        """
+        self.updated_at = now or datetime.now()
+        return self.updated_at
+    
+    def _index_working_hours(self, working_hours: WorkingHours) -> None:
+        """
+        Inclui um horário de trabalho nos índices por dia.
+        
+        Args:
+            working_hours: Horário a indexar.
+        """
+        day = working_hours.day_of_week
+        starts = self._by_day_starts.setdefault(day, [])
+        
+        # Inserir mantendo a ordem por horário de início
+        i = bisect.bisect_right(starts, working_hours.start_time)
+        starts.insert(i, working_hours.start_time)
+        self._by_day.setdefault(day, []).insert(i, working_hours)
+        
+        self._days_mask |= 1 << working_hours.day_of_week
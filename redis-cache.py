@@ -1,10 +1,13 @@
 """
 Adaptador para serviço de cache usando Redis.
 """
+import asyncio
 import json
 import logging
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, List, Optional, Set
 
+import orjson
 import redis.asyncio as redis
 
 from app.core.exceptions import CacheError
@@ -13,6 +16,34 @@ from app.core.interfaces.cache import ICache
 
 logger = logging.getLogger(__name__)
 
+# Chaves por iteração do SCAN e por comando UNLINK em clear()
+_CLEAR_SCAN_COUNT = 1000
+_CLEAR_UNLINK_BATCH = 512
+
+# INCRBY + EXPIRE atômico; o TTL só é definido se a chave ainda não tiver expiração
+# (contadores de janela fixa não têm a janela estendida a cada incremento)
+_INCR_EXPIRE_LUA = """
+local v = redis.call('INCRBY', KEYS[1], ARGV[1])
+if redis.call('TTL', KEYS[1]) < 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return v
+"""
+
+# Chaves por comando MSET em set_many_fire_and_forget
+_FIRE_AND_FORGET_CHUNK = 10000
+
+# Marcadores do tipo do valor armazenado (JSON nunca começa com "s", "j" ou "J")
+_TAG_STR = b"s"
+_TAG_JSON = b"j"
+# JSON gerado pelo módulo json (inteiros acima de 64 bits, que o orjson não
+# serializa e leria como float)
+_TAG_JSON_STD = b"J"
+
+# Primeiros bytes possíveis de um JSON sem marcador (contadores e entradas antigas)
+_JSON_STARTS = frozenset(b'{["tfn0123456789-')
+_MINUS = ord("-")
+
 
 class RedisCache:
     """
@@ -26,6 +57,7 @@ class RedisCache:
         self,
         redis_url: str,
         prefix: str = "saas:",
+        max_connections: int = 50,
     ):
         """
         Inicializa o adaptador de cache Redis.
@@ -33,16 +65,42 @@ class RedisCache:
         Args:
             redis_url: URL de conexão com o Redis.
             prefix: Prefixo para todas as chaves (para separar ambientes).
+            max_connections: Tamanho máximo do pool de conexões.
         """
         self.redis_url = redis_url
         self.prefix = prefix
+        # URL mascarada calculada uma vez para os logs
+        self._masked = self._masked_url(redis_url)
+        # Escritas em segundo plano (referência mantida até concluírem)
+        self._bg: Set[asyncio.Task] = set()
+        # Factories em execução por chave (get_or_set concorrentes compartilham o resultado)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Último PING bem-sucedido (health_check reaproveita por _ping_ttl segundos)
+        self._last_ping_ok = 0.0
+        self._ping_ttl = 1.0
         
         try:
-            # Conectar ao Redis
-            self.redis = redis.from_url(redis_url, decode_responses=True)
-            logger.info(f"Cache Redis inicializado: {self._masked_url(redis_url)}")
+            # Conectar ao Redis com pool próprio (keepalive e verificação de conexões ociosas)
+            pool = redis.ConnectionPool.from_url(
+                redis_url,
+                max_connections=max_connections,
+                # Valores trafegam como bytes (orjson lê e gera bytes diretamente)
+                decode_responses=False,
+                socket_keepalive=True,
+                health_check_interval=30,
+            )
+            self.redis = redis.Redis(connection_pool=pool)
+            self._incr_expire = self.redis.register_script(_INCR_EXPIRE_LUA)
+            
+            # Métodos mais usados resolvidos uma vez, não a cada comando
+            self._get = self.redis.get
+            self._set = self.redis.set
+            self._mget = self.redis.mget
+            self._mset = self.redis.mset
+            self._delete = self.redis.delete
+            logger.info(f"Cache Redis inicializado: {self._masked}")
         except Exception as e:
-            logger.error(f"Erro ao conectar ao Redis: {str(e)}")
+            logger.error(f"Erro ao conectar ao Redis ({self._masked}): {str(e)}")
             raise CacheError(f"Falha na conexão com Redis: {str(e)}")
     
     async def get(self, key: str) -> Optional[Any]:
@@ -57,7 +115,7 @@ class RedisCache:
         """
         try:
             prefixed_key = self._prefix_key(key)
-            value = await self.redis.get(prefixed_key)
+            value = await self._get(prefixed_key)
             
             if value is None:
                 return None
@@ -83,12 +141,10 @@ class RedisCache:
             prefixed_key = self._prefix_key(key)
             serialized = self._serialize(value)
             
-            if ttl:
-                result = await self.redis.setex(prefixed_key, ttl, serialized)
-            else:
-                result = await self.redis.set(prefixed_key, serialized)
+            # SET ... EX equivale a SETEX (ex=None grava sem expiração)
+            result = await self._set(prefixed_key, serialized, ex=ttl or None)
             
-            return result == "OK"
+            return result is True
         except Exception as e:
             logger.error(f"Erro ao definir no cache: {str(e)}")
             return False
@@ -105,7 +161,7 @@ class RedisCache:
         """
         try:
             prefixed_key = self._prefix_key(key)
-            result = await self.redis.delete(prefixed_key)
+            result = await self._delete(prefixed_key)
             return result > 0
         except Exception as e:
             logger.error(f"Erro ao remover do cache: {str(e)}")
@@ -148,6 +204,28 @@ class RedisCache:
             logger.error(f"Erro ao incrementar no cache: {str(e)}")
             raise CacheError(f"Falha ao incrementar: {str(e)}")
     
+    async def increment_with_ttl(self, key: str, amount: int, ttl: int) -> int:
+        """
+        Incrementa um valor numérico e define sua expiração em um único comando.
+        
+        Executa INCRBY e EXPIRE atomicamente no servidor (script Lua), sem a
+        janela entre increment e expire em que a chave poderia ficar sem TTL.
+        
+        Args:
+            key: Chave para incrementar.
+            amount: Valor a incrementar.
+            ttl: Tempo de vida em segundos (aplicado se a chave ainda não expira).
+            
+        Returns:
+            Novo valor após incremento.
+        """
+        try:
+            prefixed_key = self._prefix_key(key)
+            return await self._incr_expire(keys=[prefixed_key], args=[amount, ttl])
+        except Exception as e:
+            logger.error(f"Erro ao incrementar com TTL no cache: {str(e)}")
+            raise CacheError(f"Falha ao incrementar com TTL: {str(e)}")
+    
     async def expire(self, key: str, seconds: int) -> bool:
         """
         Define o tempo de expiração para uma chave.
@@ -177,18 +255,18 @@ class RedisCache:
         try:
             # Buscar todas as chaves com o prefixo
             pattern = f"{self.prefix}*"
-            cursor = 0
             count = 0
+            batch: List[bytes] = []
             
-            while True:
-                cursor, keys = await self.redis.scan(cursor, match=pattern, count=100)
-                
-                if keys:
-                    await self.redis.delete(*keys)
-                    count += len(keys)
-                
-                if cursor == 0:
-                    break
+            # UNLINK libera a memória em segundo plano no servidor, sem bloquear
+            async for key in self.redis.scan_iter(match=pattern, count=_CLEAR_SCAN_COUNT):
+                batch.append(key)
+                if len(batch) >= _CLEAR_UNLINK_BATCH:
+                    count += await self.redis.unlink(*batch)
+                    batch.clear()
+            
+            if batch:
+                count += await self.redis.unlink(*batch)
             
             logger.info(f"Cache limpo: {count} chaves removidas")
             return True
@@ -200,6 +278,11 @@ class RedisCache:
         """
         Obtém um valor do cache. Se não existir, define usando uma factory.
         
+        Chamadas concorrentes para a mesma chave compartilham uma única
+        execução da factory. A gravação do valor calculado é agendada quando
+        a factory termina, mesmo que os chamadores tenham sido cancelados; o
+        valor é retornado sem esperar pela escrita no Redis.
+        
         Args:
             key: Chave para buscar/armazenar.
             value_factory: Função assíncrona que retorna o valor caso não exista no cache.
@@ -214,13 +297,41 @@ class RedisCache:
         if value is not None:
             return value
         
-        # Se não existe, calcular valor
-        value = await value_factory()
+        # Se não existe, calcular valor (ou aguardar o cálculo já em andamento)
+        factory_task = self._inflight.get(key)
+        leader = factory_task is None
+        if leader:
+            factory_task = asyncio.ensure_future(value_factory())
+            self._inflight[key] = factory_task
+            factory_task.add_done_callback(lambda done: self._inflight_done(key, done, ttl))
+        
+        # shield: o cancelamento de um chamador não cancela o cálculo compartilhado
+        return await asyncio.shield(factory_task)
+    
+    def _inflight_done(self, key: str, task: asyncio.Task, ttl: Optional[int]) -> None:
+        """
+        Finaliza uma factory concluída: remove-a do registro de cálculos em
+        andamento e agenda a gravação do valor no cache.
+        
+        Roda como done callback da factory, então não depende de nenhum
+        chamador continuar aguardando.
+        
+        Args:
+            key: Chave do cálculo.
+            task: Task concluída.
+            ttl: Tempo de vida em segundos (opcional).
+        """
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
         
-        # Armazenar em cache para uso futuro
-        await self.set(key, value, ttl)
+        # exception() marca o erro como recuperado, mesmo sem chamadores aguardando
+        if task.cancelled() or task.exception() is not None:
+            return
         
-        return value
+        # Armazenar em cache para uso futuro, sem esperar a escrita
+        write = asyncio.create_task(self.set(key, task.result(), ttl))
+        self._bg.add(write)
+        write.add_done_callback(self._bg.discard)
     
     async def get_many(self, keys: List[str]) -> Dict[str, Any]:
         """
@@ -233,11 +344,16 @@ class RedisCache:
             Dicionário com chaves e valores encontrados.
         """
         try:
+            # MGET sem chaves é rejeitado pelo Redis
+            if not keys:
+                return {}
+            
             # Aplicar prefixo em todas as chaves
-            prefixed_keys = [self._prefix_key(key) for key in keys]
+            prefix = self.prefix
+            prefixed_keys = [prefix + key for key in keys]
             
             # Buscar valores
-            values = await self.redis.mget(prefixed_keys)
+            values = await self._mget(prefixed_keys)
             
             # Preparar resultado
             result = {}
@@ -262,27 +378,83 @@ class RedisCache:
             True se todos armazenados com sucesso, False caso contrário.
         """
         try:
-            # Preparar valores para armazenamento
-            pipeline = self.redis.pipeline()
+            if not values:
+                return True
+            
+            prefix = self.prefix
+            serialize = self._serialize
+            
+            # Sem TTL: um único MSET
+            if not ttl:
+                mapping = {prefix + key: serialize(value) for key, value in values.items()}
+                result = await self._mset(mapping)
+                return result is True
+            
+            # Com TTL: SET ... EX em um único comando por chave
+            # (sem MULTI/EXEC, a escrita em lote não precisa ser atômica)
+            pipeline = self.redis.pipeline(transaction=False)
             
             for key, value in values.items():
-                prefixed_key = self._prefix_key(key)
-                serialized = self._serialize(value)
-                
-                pipeline.set(prefixed_key, serialized)
-                if ttl:
-                    pipeline.expire(prefixed_key, ttl)
+                pipeline.set(prefix + key, serialize(value), ex=ttl)
             
             # Executar todas as operações
             results = await pipeline.execute()
             
             # Verificar se todas as operações foram bem-sucedidas
-            set_results = results[::2] if ttl else results
-            return all(result == "OK" for result in set_results)
+            return all(result is True for result in results)
         except Exception as e:
             logger.error(f"Erro ao definir múltiplos valores no cache: {str(e)}")
             return False
     
+    async def set_many_fire_and_forget(self, values: Dict[str, Any]) -> bool:
+        """
+        Define múltiplos valores sem TTL, sem ler as respostas do servidor.
+        
+        Usa uma conexão dedicada do pool com CLIENT REPLY OFF: os MSETs (em
+        blocos de até 10 mil chaves) são enviados sem que o Redis gere as
+        respostas "+OK". Útil para aquecimento de cache, quando a confirmação
+        por chave não importa. Erros do servidor nos MSETs não são detectados.
+        
+        Args:
+            values: Dicionário com chaves e valores para armazenar.
+            
+        Returns:
+            True se os comandos foram enviados, False caso contrário.
+        """
+        if not values:
+            return True
+        
+        prefix = self.prefix
+        serialize = self._serialize
+        
+        commands = []
+        args: List[Any] = []
+        for key, value in values.items():
+            args.append(prefix + key)
+            args.append(serialize(value))
+            if len(args) >= 2 * _FIRE_AND_FORGET_CHUNK:
+                commands.append(("MSET", *args))
+                args = []
+        if args:
+            commands.append(("MSET", *args))
+        
+        pool = self.redis.connection_pool
+        connection = await pool.get_connection("MSET")
+        try:
+            await connection.send_command("CLIENT", "REPLY", "OFF")
+            await connection.send_packed_command(connection.pack_commands(commands), check_health=False)
+            # Só CLIENT REPLY ON responde; lê-lo garante que os comandos anteriores foram processados
+            await connection.send_command("CLIENT", "REPLY", "ON", check_health=False)
+            await connection.read_response()
+            return True
+        except Exception as e:
+            # Estado da conexão incerto (respostas desligadas): descartá-la
+            await connection.disconnect()
+            logger.error(f"Erro ao definir múltiplos valores sem resposta no cache: {str(e)}")
+            return False
+        finally:
+            await pool.release(connection)
+    
     async def delete_many(self, keys: List[str]) -> int:
         """
         Remove múltiplos valores do cache.
@@ -298,29 +470,78 @@ class RedisCache:
                 return 0
                 
             # Aplicar prefixo em todas as chaves
-            prefixed_keys = [self._prefix_key(key) for key in keys]
+            prefix = self.prefix
+            prefixed_keys = [prefix + key for key in keys]
             
             # Remover chaves
-            result = await self.redis.delete(*prefixed_keys)
+            result = await self._delete(*prefixed_keys)
             return result
         except Exception as e:
             logger.error(f"Erro ao remover múltiplos valores do cache: {str(e)}")
             return 0
     
+    async def hgetall_many(self, keys: List[str]) -> Dict[str, Dict[str, str]]:
+        """
+        Obtém o conteúdo de múltiplos hashes em um único pipeline.
+        
+        Args:
+            keys: Lista de chaves dos hashes.
+            
+        Returns:
+            Dicionário com chaves e campos dos hashes encontrados.
+        """
+        try:
+            if not keys:
+                return {}
+            
+            prefix = self.prefix
+            pipeline = self.redis.pipeline(transaction=False)
+            
+            for key in keys:
+                pipeline.hgetall(prefix + key)
+            
+            results = await pipeline.execute()
+            
+            # HGETALL retorna um hash vazio para chaves inexistentes
+            return {
+                key: {field.decode(): data.decode() for field, data in fields.items()}
+                for key, fields in zip(keys, results)
+                if fields
+            }
+        except Exception as e:
+            logger.error(f"Erro ao obter múltiplos hashes do cache: {str(e)}")
+            return {}
+    
     async def health_check(self) -> bool:
         """
         Verifica se o serviço de cache está operacional.
         
+        Um PING bem-sucedido é reaproveitado por 1 segundo, e o PING tem
+        timeout de 0,5 segundo para não prender a verificação se o Redis
+        estiver degradado.
+        
         Returns:
             True se operacional, False caso contrário.
         """
+        now = time.monotonic()
+        if now - self._last_ping_ok < self._ping_ttl:
+            return True
+        
         try:
-            pong = await self.redis.ping()
+            pong = await asyncio.wait_for(self.redis.ping(), timeout=0.5)
+            if pong:
+                self._last_ping_ok = now
             return pong
         except Exception as e:
-            logger.warning(f"Falha no health check do Redis: {str(e)}")
+            logger.warning(f"Falha no health check do Redis ({self._masked}): {str(e) or type(e).__name__}")
             return False
     
+    async def close(self) -> None:
+        """Fecha o cliente e as conexões do pool, após concluir as escritas pendentes."""
+        if self._bg:
+            await asyncio.gather(*self._bg, return_exceptions=True)
+        await self.redis.close(close_connection_pool=True)
+    
     def _prefix_key(self, key: str) -> str:
         """
         Adiciona o prefixo à chave.
@@ -333,35 +554,77 @@ class RedisCache:
         """
         return f"{self.prefix}{key}"
     
-    def _serialize(self, value: Any) -> str:
+    def _serialize(self, value: Any) -> bytes:
         """
         Serializa um valor para armazenamento no Redis.
         
+        Strings são gravadas como estão, com o marcador "s"; os demais valores
+        como JSON com o marcador "j" ("J" se contiverem inteiros acima de 64
+        bits). Inteiros ficam sem marcador para continuarem compatíveis com
+        INCRBY (increment).
+        
         Args:
             value: Valor a serializar.
             
         Returns:
-            Valor serializado em string.
-        """
-        if isinstance(value, (str, int, float, bool)) or value is None:
-            return json.dumps(value)
-        else:
-            return json.dumps(value)
+            Valor serializado em bytes.
+        """
+        if type(value) is str:
+            return _TAG_STR + value.encode()
+        if type(value) is int:
+            return str(value).encode()
+        # Escalares mais comuns sem passar pelo encoder
+        if value is None:
+            return b"jnull"
+        if value is True:
+            return b"jtrue"
+        if value is False:
+            return b"jfalse"
+        try:
+            return _TAG_JSON + orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson rejeita inteiros acima de 64 bits; json os preserva
+            return _TAG_JSON_STD + json.dumps(value).encode()
     
-    def _deserialize(self, value: str) -> Any:
+    def _deserialize(self, value: bytes) -> Any:
         """
         Desserializa um valor do Redis.
         
+        Valores sem marcador (contadores e entradas antigas) são lidos como
+        inteiro, se forem só dígitos (sem perder precisão acima de 64 bits),
+        ou como JSON.
+        
         Args:
             value: Valor serializado.
             
         Returns:
             Valor desserializado.
         """
+        if not value:
+            return ""
+        
+        first = value[0]
+        if first == _TAG_STR[0]:
+            return value[1:].decode()
+        
+        # Inteiros sem marcador (set de int e contadores de increment)
+        if value.isdigit() or (first == _MINUS and value[1:].isdigit()):
+            return int(value)
+        
         try:
-            return json.loads(value)
-        except Exception:
-            return value
+            if first == _TAG_JSON[0]:
+                # memoryview evita copiar o valor só para remover o marcador
+                return orjson.loads(memoryview(value)[1:])
+            if first == _TAG_JSON_STD[0]:
+                return json.loads(value[1:])
+            # Sem marcador: só tenta JSON se o primeiro byte permitir
+            if first in _JSON_STARTS:
+                return orjson.loads(value)
+        except ValueError:
+            # orjson.JSONDecodeError é subclasse de ValueError
+            pass
+        
+        return value.decode(errors="replace")
     
     def _masked_url(self, url: str) -> str:
         """
@@ -2,7 +2,8 @@
 Interfaces para repositórios seguindo o princípio de Inversão de Dependência (SOLID).
 Define contratos para acesso a dados de diferentes entidades.
 """
-from typing import List, Optional, Protocol, TypeVar, Generic, Dict, Any
+import abc
+from typing import List, Optional, TypeVar, Generic, Dict, Any
 from uuid import UUID
 
 from app.core.entities.appointment import Appointment
@@ -15,9 +16,15 @@ from app.core.entities.user import User
 T = TypeVar('T')
 
 
-class IRepository(Protocol, Generic[T]):
-    """Interface base para repositórios."""
+class IRepository(abc.ABC, Generic[T]):
+    """
+    Interface base para repositórios.
     
+    Classes abstratas (e não Protocol): as implementações herdam da interface,
+    e isinstance é uma verificação nominal, sem inspecionar cada método.
+    """
+    
+    @abc.abstractmethod
     async def create(self, data: Dict[str, Any]) -> T:
         """
         Cria uma nova entidade.
@@ -30,6 +37,7 @@ class IRepository(Protocol, Generic[T]):
         """
         ...
     
+    @abc.abstractmethod
     async def get_by_id(self, entity_id: UUID) -> Optional[T]:
         """
         Obtém uma entidade pelo ID.
@@ -42,6 +50,23 @@ class IRepository(Protocol, Generic[T]):
         """
         ...
     
+    async def get_many_by_ids(self, entity_ids: List[UUID]) -> List[Optional[T]]:
+        """
+        Obtém várias entidades pelos IDs.
+        
+        A implementação padrão chama get_by_id para cada ID; repositórios
+        com banco de dados devem sobrescrevê-la com uma única consulta
+        (ex: WHERE id = ANY(:ids)).
+        
+        Args:
+            entity_ids: IDs das entidades.
+            
+        Returns:
+            Entidades na mesma ordem dos IDs (None para as não encontradas).
+        """
+        return [await self.get_by_id(entity_id) for entity_id in entity_ids]
+    
+    @abc.abstractmethod
     async def update(self, entity_id: UUID, data: Dict[str, Any]) -> Optional[T]:
         """
         Atualiza uma entidade.
@@ -55,6 +80,7 @@ class IRepository(Protocol, Generic[T]):
         """
         ...
     
+    @abc.abstractmethod
     async def delete(self, entity_id: UUID) -> bool:
         """
         Remove uma entidade.
@@ -67,6 +93,7 @@ class IRepository(Protocol, Generic[T]):
         """
         ...
     
+    @abc.abstractmethod
     async def list(self, filters: Dict[str, Any] = None, skip: int = 0, limit: int = 100) -> List[T]:
         """
         Lista entidades com filtros.
@@ -82,9 +109,10 @@ class IRepository(Protocol, Generic[T]):
         ...
 
 
-class IAppointmentRepository(IRepository[Appointment], Protocol):
+class IAppointmentRepository(IRepository[Appointment]):
     """Interface para repositório de agendamentos."""
     
+    @abc.abstractmethod
     async def find_by_client(self, client_id: UUID) -> List[Appointment]:
         """
         Obtém agendamentos de um cliente.
@@ -97,6 +125,7 @@ class IAppointmentRepository(IRepository[Appointment], Protocol):
         """
         ...
     
+    @abc.abstractmethod
     async def find_by_professional(self, professional_id: UUID) -> List[Appointment]:
         """
         Obtém agendamentos de um profissional.
@@ -109,6 +138,7 @@ class IAppointmentRepository(IRepository[Appointment], Protocol):
         """
         ...
     
+    @abc.abstractmethod
     async def find_by_date_range(self, start_date: str, end_date: str) -> List[Appointment]:
         """
         Obtém agendamentos em um intervalo de datas.
@@ -122,6 +152,7 @@ class IAppointmentRepository(IRepository[Appointment], Protocol):
         """
         ...
     
+    @abc.abstractmethod
     async def check_availability(self, professional_id: UUID, start_time: str, end_time: str) -> bool:
         """
         Verifica disponibilidade de um profissional em um horário.
@@ -137,9 +168,10 @@ class IAppointmentRepository(IRepository[Appointment], Protocol):
         ...
 
 
-class IClientRepository(IRepository[Client], Protocol):
+class IClientRepository(IRepository[Client]):
     """Interface para repositório de clientes."""
     
+    @abc.abstractmethod
     async def find_by_phone(self, phone: str) -> Optional[Client]:
         """
         Obtém um cliente pelo telefone.
@@ -152,6 +184,7 @@ class IClientRepository(IRepository[Client], Protocol):
         """
         ...
     
+    @abc.abstractmethod
     async def find_by_email(self, email: str) -> Optional[Client]:
         """
         Obtém um cliente pelo email.
@@ -164,6 +197,7 @@ class IClientRepository(IRepository[Client], Protocol):
         """
         ...
     
+    @abc.abstractmethod
     async def find_active(self) -> List[Client]:
         """
         Obtém clientes ativos.
@@ -173,6 +207,7 @@ class IClientRepository(IRepository[Client], Protocol):
         """
         ...
     
+    @abc.abstractmethod
     async def find_inactive(self, days: int = 30) -> List[Client]:
         """
         Obtém clientes inativos por um período.
@@ -186,9 +221,10 @@ class IClientRepository(IRepository[Client], Protocol):
         ...
 
 
-class IProfessionalRepository(IRepository[Professional], Protocol):
+class IProfessionalRepository(IRepository[Professional]):
     """Interface para repositório de profissionais."""
     
+    @abc.abstractmethod
     async def find_available(self, start_time: str, end_time: str) -> List[Professional]:
         """
         Obtém profissionais disponíveis em um horário.
@@ -202,6 +238,7 @@ class IProfessionalRepository(IRepository[Professional], Protocol):
         """
         ...
     
+    @abc.abstractmethod
     async def find_by_speciality(self, speciality: str) -> List[Professional]:
         """
         Obtém profissionais por especialidade.
@@ -215,9 +252,10 @@ class IProfessionalRepository(IRepository[Professional], Protocol):
         ...
 
 
-class IUserRepository(IRepository[User], Protocol):
+class IUserRepository(IRepository[User]):
     """Interface para repositório de usuários."""
     
+    @abc.abstractmethod
     async def find_by_email(self, email: str) -> Optional[User]:
         """
         Obtém um usuário pelo email.
@@ -230,6 +268,7 @@ class IUserRepository(IRepository[User], Protocol):
         """
         ...
     
+    @abc.abstractmethod
     async def find_by_username(self, username: str) -> Optional[User]:
         """
         Obtém um usuário pelo nome de usuário.
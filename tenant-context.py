@@ -1,12 +1,58 @@
 """
 Implementação do contexto de tenant para suporte a multi-tenancy.
 """
-from contextvars import ContextVar
+from contextvars import ContextVar, Token
 from typing import Optional
 
 from app.core.exceptions import TenantNotSetError
 
 
+# ContextVar com o tenant_id da requisição atual (compartilhada por todo o processo)
+_TENANT_CV: ContextVar[Optional[str]] = ContextVar("tenant_id", default=None)
+
+
+def get_tenant_id() -> str:
+    """
+    Obtém o ID do tenant definido para a requisição atual.
+    
+    Acesso direto à ContextVar, para caminhos quentes que não têm o
+    TenantContext em mãos. Não considera o tenant padrão do TenantContext.
+    
+    Returns:
+        str: ID do tenant atual.
+        
+    Raises:
+        TenantNotSetError: Se o ID do tenant não estiver definido.
+    """
+    tenant_id = _TENANT_CV.get()
+    if tenant_id is None:
+        raise TenantNotSetError("ID do tenant não está configurado no contexto atual")
+    return tenant_id
+
+
+def set_tenant_id(tenant_id: Optional[str]) -> Token:
+    """
+    Define o ID do tenant para o contexto atual.
+    
+    Args:
+        tenant_id: ID do tenant a ser definido.
+        
+    Returns:
+        Token para restaurar o valor anterior com reset_tenant_id.
+    """
+    return _TENANT_CV.set(tenant_id)
+
+
+def reset_tenant_id(token: Token) -> None:
+    """
+    Restaura o ID do tenant anterior a um set_tenant_id.
+    
+    Args:
+        token: Token retornado por set_tenant_id.
+    """
+    _TENANT_CV.reset(token)
+
+
 class TenantContext:
     """
     Contexto de tenant para gerenciar o ID do tenant atual.
@@ -15,6 +61,8 @@ class TenantContext:
     mesmo com múltiplas requisições concorrentes.
     """
     
+    __slots__ = ("_default_tenant_id",)
+    
     def __init__(self, default_tenant_id: Optional[str] = None):
         """
         Inicializa o contexto de tenant.
@@ -22,8 +70,7 @@ class TenantContext:
         Args:
             default_tenant_id: ID de tenant padrão (opcional, para desenvolvimento)
         """
-        # ContextVar para armazenar o tenant_id da requisição atual
-        self._tenant_id_var: ContextVar[Optional[str]] = ContextVar('tenant_id', default=default_tenant_id)
+        self._default_tenant_id = default_tenant_id
     
     @property
     def tenant_id(self) -> str:
@@ -36,25 +83,30 @@ class TenantContext:
         Raises:
             TenantNotSetError: Se o ID do tenant não estiver definido e não houver padrão.
         """
-        tenant_id = self._tenant_id_var.get()
+        tenant_id = _TENANT_CV.get()
         if tenant_id is None:
-            raise TenantNotSetError("ID do tenant não está configurado no contexto atual")
+            tenant_id = self._default_tenant_id
+            if tenant_id is None:
+                raise TenantNotSetError("ID do tenant não está configurado no contexto atual")
         return tenant_id
     
-    def set_tenant_id(self, tenant_id: str) -> None:
+    def set_tenant_id(self, tenant_id: str) -> Token:
         """
         Define o ID do tenant para o contexto atual.
         
         Args:
             tenant_id: ID do tenant a ser definido.
+            
+        Returns:
+            Token para restaurar o valor anterior com reset_tenant_id.
         """
-        self._tenant_id_var.set(tenant_id)
+        return _TENANT_CV.set(tenant_id)
     
     def reset(self) -> None:
         """
         Redefine o ID do tenant para o valor padrão (útil para testes).
         """
-        self._tenant_id_var.set(None)
+        _TENANT_CV.set(None)
     
     def __str__(self) -> str:
         """Representação em string do contexto."""
@@ -9,7 +9,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 
 from app.core.config import settings
 from app.core.exceptions import TenantNotFoundError
-from app.core.services.tenant_context import TenantContext
+from app.core.services.tenant_context import reset_tenant_id, set_tenant_id
 
 
 logger = logging.getLogger(__name__)
@@ -24,6 +24,11 @@ class TenantMiddleware(BaseHTTPMiddleware):
     
     def __init__(self, app):
         super().__init__(app)
+        # Configurações lidas uma vez (não mudam durante a execução)
+        self._multi_tenant = settings.MULTI_TENANT_ENABLED
+        self._default_tenant_id = settings.DEFAULT_TENANT_ID
+        # Allow-list de tenants (vazia = sem validação)
+        self._known_tenants = frozenset(settings.KNOWN_TENANTS)
     
     async def dispatch(self, request: Request, call_next: Callable):
         """
@@ -36,14 +41,14 @@ class TenantMiddleware(BaseHTTPMiddleware):
         Returns:
             Resposta HTTP.
         """
-        # Tentar extrair tenant_id da requisição
-        tenant_id = self._extract_tenant_id(request)
+        # Tentar extrair tenant_id da requisição (MVP: tenant fixo, sem extração)
+        if self._multi_tenant:
+            tenant_id = self._extract_tenant_id(request)
+        else:
+            tenant_id = self._default_tenant_id
         
-        # Obter o contexto de tenant da aplicação
-        tenant_context = request.app.state.injector.get(TenantContext)
-        
-        # Configurar tenant_id no contexto
-        tenant_context.set_tenant_id(tenant_id)
+        # Configurar tenant_id no contexto (lido por TenantContext e get_tenant_id)
+        token = set_tenant_id(tenant_id)
         
         # Armazenar tenant_id no estado da requisição para uso em dependências
         request.state.tenant_id = tenant_id
@@ -54,9 +59,8 @@ class TenantMiddleware(BaseHTTPMiddleware):
             response = await call_next(request)
             return response
         finally:
-            # Limpar contexto após a requisição (opcional dependendo da implementação)
-            # tenant_context.reset()
-            pass
+            # Restaurar o contexto anterior após a requisição
+            reset_tenant_id(token)
     
     def _extract_tenant_id(self, request: Request) -> str:
         """
@@ -76,11 +80,11 @@ class TenantMiddleware(BaseHTTPMiddleware):
             ID do tenant.
             
         Raises:
-            TenantNotFoundError: Se o tenant não for encontrado.
+            TenantNotFoundError: Se o tenant não for encontrado ou não for conhecido.
         """
         # MVP: Retornar tenant fixo
-        if not settings.MULTI_TENANT_ENABLED:
-            return settings.DEFAULT_TENANT_ID
+        if not self._multi_tenant:
+            return self._default_tenant_id
             
         # Multi-tenant: Extrair de diferentes fontes
         tenant_id = None
@@ -88,19 +92,19 @@ class TenantMiddleware(BaseHTTPMiddleware):
         # 1. Verificar header específico
         tenant_id = request.headers.get("X-Tenant-ID")
         if tenant_id:
-            return tenant_id
+            return self._check_known(tenant_id)
             
         # 2. Extrair de subdomain
         host = request.headers.get("host", "")
         if "." in host and not host.startswith("www."):
-            subdomain = host.split(".")[0]
+            subdomain = host.partition(".")[0]
             # Aqui poderia ter uma lógica para mapear subdomain para tenant_id
             tenant_id = subdomain
             
         # 3. Extrair de Authorization token (JWT)
         auth_header = request.headers.get("Authorization")
         if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
+            token = auth_header[7:]
             # Aqui poderia ter uma lógica para extrair tenant_id do token
             # tenant_id = decode_jwt(token).get("tenant_id")
             
@@ -111,11 +115,28 @@ class TenantMiddleware(BaseHTTPMiddleware):
             
         # Se não encontrou em nenhum lugar, usar o padrão
         if not tenant_id:
-            if settings.DEFAULT_TENANT_ID:
-                tenant_id = settings.DEFAULT_TENANT_ID
+            if self._default_tenant_id:
+                tenant_id = self._default_tenant_id
             else:
                 raise TenantNotFoundError("ID do tenant não encontrado na requisição")
                 
+        return self._check_known(tenant_id)
+    
+    def _check_known(self, tenant_id: str) -> str:
+        """
+        Valida o tenant contra a allow-list KNOWN_TENANTS (se configurada).
+        
+        Args:
+            tenant_id: ID do tenant extraído.
+            
+        Returns:
+            O próprio ID do tenant.
+            
+        Raises:
+            TenantNotFoundError: Se o tenant não estiver na allow-list.
+        """
+        if self._known_tenants and tenant_id not in self._known_tenants:
+            raise TenantNotFoundError(f"Tenant desconhecido: {tenant_id}")
         return tenant_id
 
 
@@ -137,17 +158,3 @@ async def get_tenant_id(request: Request) -> str:
     if not tenant_id:
         raise TenantNotFoundError("ID do tenant não está configurado para esta requisição")
     return tenant_id
-
-
-# Dependency para obter o contexto de tenant
-async def get_tenant_context(request: Request) -> TenantContext:
-    """
-    Dependency para obter o contexto de tenant.
-    
-    Args:
-        request: Requisição HTTP.
-        
-    Returns:
-        Contexto de tenant.
-    """
-    return request.app.state.injector.get(TenantContext)
@@ -1,10 +1,13 @@
 """
 Adaptador para envio de mensagens WhatsApp via Twilio.
 """
+import asyncio
+import functools
 import logging
-from typing import Dict, List, Optional, Any
+import re
+from typing import Callable, Dict, List, Mapping, Optional, Any
 
-from twilio.rest import Client
+import httpx
 from twilio.base.exceptions import TwilioRestException
 
 from app.core.exceptions import MessagingError
@@ -18,6 +21,78 @@ from app.core.interfaces.message_provider import (
 
 logger = logging.getLogger(__name__)
 
+# API REST da Twilio (envio de mensagens)
+_TWILIO_API_URL = "https://api.twilio.com/2010-04-01"
+
+# Limites do pool de conexões HTTP com a API da Twilio
+_HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=50)
+
+# Caracteres não numéricos de um telefone
+_NON_DIGITS_RE = re.compile(r"\D+")
+
+# Placeholders no formato {{variavel}}
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+
+
+def _compile_template(content: str) -> Callable[[Mapping[str, Any]], str]:
+    """
+    Pré-compila o conteúdo de um template em uma função de renderização.
+    
+    Gera o código Python de uma função que monta a mensagem em uma única
+    expressão (trechos literais e valores de params) e o compila com exec,
+    uma única vez por template. Placeholders sem valor em params são
+    mantidos como estão.
+    
+    Args:
+        content: Conteúdo do template.
+        
+    Returns:
+        Função que recebe os parâmetros e retorna a mensagem.
+    """
+    # split alterna texto literal (posições pares) e nomes de variáveis (ímpares)
+    parts = _PLACEHOLDER_RE.split(content)
+    
+    pieces = []
+    for i, part in enumerate(parts):
+        if i % 2:
+            # Nomes são \w+ (validados pela regex) e entram no código via repr
+            placeholder = "{{" + part + "}}"
+            pieces.append(f"(str(p[{part!r}]) if {part!r} in p else {placeholder!r})")
+        elif part:
+            pieces.append(repr(part))
+    
+    if not pieces:
+        pieces.append("''")
+    
+    source = f"def render(p):\n    return ''.join(({', '.join(pieces)},))\n"
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, "<twilio-template>", "exec"), {"str": str}, namespace)
+    return namespace["render"]
+
+
+@functools.lru_cache(maxsize=10000)
+def _format_whatsapp_number(phone: str) -> str:
+    """
+    Formata um telefone para o formato do WhatsApp no Twilio (com cache).
+    
+    Os mesmos clientes recebem várias mensagens, então o resultado é
+    memorizado por número.
+    
+    Args:
+        phone: Número de telefone.
+        
+    Returns:
+        Número formatado (whatsapp:+55...).
+    """
+    # Remover caracteres não numéricos
+    clean_number = _NON_DIGITS_RE.sub("", phone)
+    
+    # Adicionar código do Brasil se ainda não tiver código do país
+    if not clean_number.startswith("55"):
+        clean_number = "55" + clean_number
+    
+    return f"whatsapp:+{clean_number}"
+
 
 class TwilioWhatsAppProvider:
     """
@@ -31,6 +106,7 @@ class TwilioWhatsAppProvider:
         account_sid: str,
         auth_token: str,
         whatsapp_number: str,
+        max_concurrency: int = 50,
     ):
         """
         Inicializa o provedor WhatsApp.
@@ -39,13 +115,24 @@ class TwilioWhatsAppProvider:
             account_sid: SID da conta Twilio.
             auth_token: Token de autenticação Twilio.
             whatsapp_number: Número de WhatsApp configurado no Twilio.
+            max_concurrency: Máximo de envios simultâneos em send_many.
         """
         self.account_sid = account_sid
         self.auth_token = auth_token
         self.whatsapp_number = whatsapp_number
+        # Remetente no formato do Twilio (fixo para o provedor)
+        self._from_formatted = f"whatsapp:{whatsapp_number}"
         
-        # Inicializar cliente Twilio
-        self.client = Client(account_sid, auth_token)
+        # Cliente HTTP assíncrono compartilhado com a API REST da Twilio
+        # (conexões reaproveitadas entre os envios, sem bloquear o event loop)
+        self._messages_url = f"{_TWILIO_API_URL}/Accounts/{account_sid}/Messages.json"
+        self._http = httpx.AsyncClient(
+            auth=(account_sid, auth_token),
+            limits=_HTTP_LIMITS,
+            timeout=30,
+        )
+        self._post = self._http.post
+        self._send_semaphore = asyncio.Semaphore(max_concurrency)
         
         # Templates disponíveis (na versão completa, viria do banco/tenant)
         self._templates = {
@@ -65,6 +152,10 @@ class TwilioWhatsAppProvider:
                 variables=["name", "business"],
             ),
         }
+        self._renderers = {
+            template_id: _compile_template(template.content)
+            for template_id, template in self._templates.items()
+        }
         
         logger.info(f"Provedor TwilioWhatsApp inicializado para o número {whatsapp_number}")
     
@@ -96,31 +187,31 @@ class TwilioWhatsAppProvider:
             if not template:
                 raise MessagingError(f"Template {template_id} não encontrado")
             
-            # Formatar mensagem com os parâmetros
-            message_body = template.content
-            for key, value in params.items():
-                placeholder = "{{" + key + "}}"
-                message_body = message_body.replace(placeholder, str(value))
+            # Formatar mensagem com os parâmetros (renderizador pré-compilado)
+            renderer = self._renderers.get(template_id)
+            if renderer is None:
+                renderer = _compile_template(template.content)
+            message_body = renderer(params)
             
             # Preparar número de destino no formato do Twilio
             to_formatted = self._format_phone_number(to)
-            from_formatted = f"whatsapp:{self.whatsapp_number}"
+            from_formatted = self._from_formatted
             
             # Enviar mensagem
             media_urls = self._prepare_attachment_urls(attachments) if attachments else None
             
-            message = self.client.messages.create(
+            message_sid = await self._create_message(
                 body=message_body,
                 from_=from_formatted,
                 to=to_formatted,
-                media_url=media_urls,
+                media_urls=media_urls,
             )
             
-            logger.info(f"Mensagem WhatsApp enviada. SID: {message.sid}")
+            logger.info(f"Mensagem WhatsApp enviada. SID: {message_sid}")
             
             return MessageResponse(
                 success=True,
-                message_id=message.sid,
+                message_id=message_sid,
                 provider="twilio_whatsapp",
                 channel="whatsapp",
             )
@@ -167,23 +258,23 @@ class TwilioWhatsAppProvider:
         try:
             # Preparar número de destino no formato do Twilio
             to_formatted = self._format_phone_number(to)
-            from_formatted = f"whatsapp:{self.whatsapp_number}"
+            from_formatted = self._from_formatted
             
             # Enviar mensagem
             media_urls = self._prepare_attachment_urls(attachments) if attachments else None
             
-            message = self.client.messages.create(
+            message_sid = await self._create_message(
                 body=content,
                 from_=from_formatted,
                 to=to_formatted,
-                media_url=media_urls,
+                media_urls=media_urls,
             )
             
-            logger.info(f"Mensagem direta WhatsApp enviada. SID: {message.sid}")
+            logger.info(f"Mensagem direta WhatsApp enviada. SID: {message_sid}")
             
             return MessageResponse(
                 success=True,
-                message_id=message.sid,
+                message_id=message_sid,
                 provider="twilio_whatsapp",
                 channel="whatsapp",
             )
@@ -205,6 +296,35 @@ class TwilioWhatsAppProvider:
                 error=str(e),
             )
     
+    async def send_many(self, messages: List[Dict[str, Any]]) -> List[MessageResponse]:
+        """
+        Envia várias mensagens com template de forma concorrente.
+        
+        No máximo max_concurrency envios ficam em andamento ao mesmo tempo.
+        
+        Args:
+            messages: Argumentos de send para cada mensagem
+                (to, template_id, params e, opcionalmente, attachments).
+            
+        Returns:
+            Respostas na mesma ordem das mensagens.
+        """
+        async def send_one(message: Dict[str, Any]) -> MessageResponse:
+            async with self._send_semaphore:
+                return await self.send(**message)
+        
+        results = await asyncio.gather(*(send_one(message) for message in messages), return_exceptions=True)
+        
+        return [
+            result if isinstance(result, MessageResponse) else MessageResponse(
+                success=False,
+                provider="twilio_whatsapp",
+                channel="whatsapp",
+                error=str(result),
+            )
+            for result in results
+        ]
+    
     async def get_template(self, template_id: str) -> Optional[MessageTemplate]:
         """
         Obtém um template por ID.
@@ -217,6 +337,56 @@ class TwilioWhatsAppProvider:
         """
         return self._templates.get(template_id)
     
+    async def close(self) -> None:
+        """
+        Fecha o cliente HTTP compartilhado e libera as conexões abertas.
+        """
+        await self._http.aclose()
+    
+    async def _create_message(
+        self,
+        body: str,
+        from_: str,
+        to: str,
+        media_urls: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Cria uma mensagem na API REST da Twilio.
+        
+        Args:
+            body: Texto da mensagem.
+            from_: Remetente no formato do Twilio.
+            to: Destinatário no formato do Twilio.
+            media_urls: URLs de mídia (opcional).
+            
+        Returns:
+            SID da mensagem criada.
+            
+        Raises:
+            TwilioRestException: Se a API retornar erro.
+        """
+        data: Dict[str, Any] = {"Body": body, "From": from_, "To": to}
+        if media_urls:
+            data["MediaUrl"] = media_urls
+        
+        response = await self._post(self._messages_url, data=data)
+        
+        if response.is_error:
+            # Mesmo formato de erro do SDK da Twilio
+            try:
+                error = response.json()
+            except ValueError:
+                error = {}
+            raise TwilioRestException(
+                response.status_code,
+                self._messages_url,
+                msg=error.get("message", response.text),
+                code=error.get("code"),
+                method="POST",
+            )
+        
+        return response.json()["sid"]
+    
     def _format_phone_number(self, phone: str) -> str:
         """
         Formata um número de telefone para o formato esperado pelo Twilio.
@@ -227,16 +397,7 @@ class TwilioWhatsAppProvider:
         Returns:
             Número formatado.
         """
-        # Remover caracteres não numéricos
-        clean_number = ''.join(filter(str.isdigit, phone))
-        
-        # Verificar se já tem código do país
-        if not clean_number.startswith('55'):
-            # Adicionar código do Brasil
-            clean_number = '55' + clean_number
-        
-        # Formatar para WhatsApp
-        return f"whatsapp:+{clean_number}"
+        return _format_whatsapp_number(phone)
     
     def _prepare_attachment_urls(self, attachments: List[MessageAttachment]) -> List[str]:
         """
@@ -1,21 +1,29 @@
 """
 Entidade de Usuário (User) no domínio central.
 """
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
-from enum import Enum
-from typing import Dict, List, Optional, Set
-from uuid import UUID, uuid4
+from enum import Enum, IntFlag
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+from uuid import UUID
 
+from app.core.entities.ids import next_uuid
 
-class UserRole(str, Enum):
-    """Papéis possíveis para um usuário."""
-    
-    ADMIN = "admin"              # Administrador (acesso total)
-    MANAGER = "manager"          # Gerente (acesso a gestão)
-    PROFESSIONAL = "professional"  # Profissional (acesso próprio)
-    RECEPTIONIST = "receptionist"  # Recepcionista (agendamentos)
-    CLIENT = "client"            # Cliente (acesso limitado)
+
+class UserRole(IntFlag):
+    """
+    Papéis possíveis para um usuário.
+    
+    Cada papel é um bit; os papéis de um usuário são a combinação (|) deles.
+    Para converter do nome em texto (ex: "admin"), use UserRole[nome.upper()].
+    """
+    
+    ADMIN = 1              # Administrador (acesso total)
+    MANAGER = 2            # Gerente (acesso a gestão)
+    PROFESSIONAL = 4       # Profissional (acesso próprio)
+    RECEPTIONIST = 8       # Recepcionista (agendamentos)
+    CLIENT = 16            # Cliente (acesso limitado)
 
 
 class UserStatus(str, Enum):
@@ -27,7 +35,7 @@ class UserStatus(str, Enum):
     BLOCKED = "blocked"      # Usuário bloqueado
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Permission:
     """Permissão específica no sistema."""
     
@@ -38,7 +46,7 @@ class Permission:
         return f"{self.resource}:{self.action}"
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     """
     Entidade de Usuário.
@@ -51,104 +59,155 @@ class User:
     hashed_password: str
     first_name: str
     last_name: Optional[str] = None
-    roles: List[UserRole] = field(default_factory=list)
-    permissions: List[Permission] = field(default_factory=list)
+    roles: UserRole = UserRole(0)
+    permissions: Set[Permission] = field(default_factory=set)
     status: UserStatus = UserStatus.ACTIVE
     last_login: Optional[datetime] = None
     password_reset_token: Optional[str] = None
-    password_reset_expires: Optional[datetime] = None
-    id: UUID = field(default_factory=uuid4)
+    password_reset_expires_ts: Optional[float] = None  # Expiração do token (epoch em segundos)
+    id: UUID = field(default_factory=next_uuid)
     tenant_id: str = field(default="")
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: Optional[datetime] = None
     
-    def activate(self) -> None:
-        """Ativa o usuário."""
+    # Pares (recurso, ação) das permissões, reconstruído a cada alteração de permissions
+    _permission_index: FrozenSet[Tuple[str, str]] = field(default=frozenset(), init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        """Constrói o índice de permissões a partir dos dados iniciais."""
+        self._rebuild_permission_index()
+    
+    @property
+    def password_reset_expires(self) -> Optional[datetime]:
+        """Expiração do token de redefinição de senha como datetime (horário local)."""
+        if self.password_reset_expires_ts is None:
+            return None
+        return datetime.fromtimestamp(self.password_reset_expires_ts)
+    
+    @password_reset_expires.setter
+    def password_reset_expires(self, value: Optional[datetime]) -> None:
+        self.password_reset_expires_ts = value.timestamp() if value is not None else None
+    
+    def activate(self, now: Optional[datetime] = None) -> None:
+        """
+        Ativa o usuário.
+        
+        Args:
+            now: Timestamp da alteração (opcional, usa o horário atual).
+        """
         self.status = UserStatus.ACTIVE
-        self.updated_at = datetime.now()
+        self._touch(now)
     
-    def deactivate(self) -> None:
-        """Desativa o usuário."""
+    def deactivate(self, now: Optional[datetime] = None) -> None:
+        """
+        Desativa o usuário.
+        
+        Args:
+            now: Timestamp da alteração (opcional, usa o horário atual).
+        """
         self.status = UserStatus.INACTIVE
-        self.updated_at = datetime.now()
+        self._touch(now)
     
-    def block(self) -> None:
-        """Bloqueia o usuário."""
+    def block(self, now: Optional[datetime] = None) -> None:
+        """
+        Bloqueia o usuário.
+        
+        Args:
+            now: Timestamp da alteração (opcional, usa o horário atual).
+        """
         self.status = UserStatus.BLOCKED
-        self.updated_at = datetime.now()
+        self._touch(now)
     
-    def add_role(self, role: UserRole) -> None:
+    def add_role(self, role: UserRole, now: Optional[datetime] = None) -> None:
         """
         Adiciona um papel ao usuário.
         
         Args:
             role: Papel a adicionar.
+            now: Timestamp da alteração (opcional, usa o horário atual).
         """
-        if role not in self.roles:
-            self.roles.append(role)
-            self.updated_at = datetime.now()
+        if not self.roles & role:
+            self.roles |= role
+            self._touch(now)
     
-    def remove_role(self, role: UserRole) -> None:
+    def remove_role(self, role: UserRole, now: Optional[datetime] = None) -> None:
         """
         Remove um papel do usuário.
         
         Args:
             role: Papel a remover.
+            now: Timestamp da alteração (opcional, usa o horário atual).
         """
-        if role in self.roles:
-            self.roles.remove(role)
-            self.updated_at = datetime.now()
+        if self.roles & role:
+            self.roles &= ~role
+            self._touch(now)
     
-    def add_permission(self, resource: str, action: str) -> None:
+    def add_permission(self, resource: str, action: str, now: Optional[datetime] = None) -> None:
         """
         Adiciona uma permissão específica ao usuário.
         
         Args:
             resource: Recurso da permissão.
             action: Ação permitida.
+            now: Timestamp da alteração (opcional, usa o horário atual).
         """
         permission = Permission(resource=resource, action=action)
         if permission not in self.permissions:
-            self.permissions.append(permission)
-            self.updated_at = datetime.now()
+            self.permissions.add(permission)
+            self._rebuild_permission_index()
+            self._touch(now)
     
-    def remove_permission(self, resource: str, action: str) -> None:
+    def remove_permission(self, resource: str, action: str, now: Optional[datetime] = None) -> None:
         """
         Remove uma permissão específica do usuário.
         
         Args:
             resource: Recurso da permissão.
             action: Ação permitida.
+            now: Timestamp da alteração (opcional, usa o horário atual).
         """
         permission = Permission(resource=resource, action=action)
         if permission in self.permissions:
-            self.permissions.remove(permission)
-            self.updated_at = datetime.now()
+            self.permissions.discard(permission)
+            self._rebuild_permission_index()
+            self._touch(now)
     
-    def update_last_login(self) -> None:
-        """Atualiza o timestamp do último login."""
-        self.last_login = datetime.now()
-        self.updated_at = datetime.now()
+    def update_last_login(self, now: Optional[datetime] = None) -> None:
+        """
+        Atualiza o timestamp do último login.
+        
+        Args:
+            now: Timestamp do login (opcional, usa o horário atual).
+        """
+        self.last_login = self._touch(now)
     
-    def set_password_reset_token(self, token: str, expires_in_hours: int = 24) -> None:
+    def set_password_reset_token(
+        self,
+        token: str,
+        expires_in_hours: int = 24,
+        now: Optional[datetime] = None,
+    ) -> None:
         """
         Define um token de redefinição de senha.
         
         Args:
             token: Token de redefinição.
             expires_in_hours: Horas até expiração.
+            now: Timestamp da alteração (opcional, usa o horário atual).
         """
         self.password_reset_token = token
-        self.password_reset_expires = datetime.now().replace(
-            hour=datetime.now().hour + expires_in_hours
-        )
-        self.updated_at = datetime.now()
+        self.password_reset_expires_ts = self._touch(now).timestamp() + expires_in_hours * 3600
     
-    def clear_password_reset_token(self) -> None:
-        """Limpa o token de redefinição de senha."""
+    def clear_password_reset_token(self, now: Optional[datetime] = None) -> None:
+        """
+        Limpa o token de redefinição de senha.
+        
+        Args:
+            now: Timestamp da alteração (opcional, usa o horário atual).
+        """
         self.password_reset_token = None
-        self.password_reset_expires = None
-        self.updated_at = datetime.now()
+        self.password_reset_expires_ts = None
+        self._touch(now)
     
     def is_password_reset_token_valid(self) -> bool:
         """
@@ -157,10 +216,11 @@ class User:
         Returns:
             True se válido, False caso contrário.
         """
-        if not self.password_reset_token or not self.password_reset_expires:
+        expires_ts = self.password_reset_expires_ts
+        if not self.password_reset_token or expires_ts is None:
             return False
         
-        return datetime.now() < self.password_reset_expires
+        return time.time() < expires_ts
     
     def is_active(self) -> bool:
         """
@@ -176,12 +236,12 @@ class User:
         Verifica se o usuário tem um papel específico.
         
         Args:
-            role: Papel a verificar.
+            role: Papel a verificar (ou combinação de papéis: basta ter um deles).
             
         Returns:
             True se tem o papel, False caso contrário.
         """
-        return role in self.roles
+        return bool(self.roles & role)
     
     def has_permission(self, resource: str, action: str) -> bool:
         """
@@ -195,12 +255,11 @@ class User:
             True se tem a permissão, False caso contrário.
         """
         # Admin tem todas as permissões
-        if UserRole.ADMIN in self.roles:
+        if self.roles & UserRole.ADMIN:
             return True
         
-        # Verifica permissão específica
-        permission = Permission(resource=resource, action=action)
-        return permission in self.permissions
+        # Verifica permissão específica (sem instanciar Permission)
+        return (resource, action) in self._permission_index
     
     def full_name(self) -> str:
         """
@@ -212,3 +271,27 @@ class User:
         if self.last_name:
             return f"{self.first_name} {self.last_name}"
         return self.first_name
+    
+    def _touch(self, now: Optional[datetime] = None) -> datetime:
+        """
+        Atualiza o timestamp de modificação.
+        
+        Permite compartilhar um único datetime.now() entre várias alterações.
+        
+        Args:
+            now: Timestamp a usar (opcional, usa o horário atual).
+            
+        Returns:
+            Timestamp aplicado.
+        """
+        self.updated_at = now or datetime.now()
+        return self.updated_at
+    
+    def _rebuild_permission_index(self) -> None:
+        """
+        Reconstrói o índice (recurso, ação) usado por has_permission.
+        
+        Deve ser chamado sempre que permissions for alterado fora de
+        add_permission/remove_permission.
+        """
+        self._permission_index = frozenset((p.resource, p.action) for p in self.permissions)